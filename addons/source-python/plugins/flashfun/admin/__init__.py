@@ -11,12 +11,15 @@ from listeners import OnLevelInit
 #   Menus
 from menus import PagedMenu
 from menus import PagedOption
-#   Players
-from players.entity import Player
 
 # Plugin Imports
+#   Flashbangs
+from flashfun.flashbangs import flashbang_equipper
+#   Player Cache
+from flashfun.player_cache import player_cache
+#   Stats
+from flashfun.stats import hook_stats
 #   Util
-from flashfun.util import equip_player
 from flashfun.util import disable_damage_protection
 
 
@@ -53,13 +56,13 @@ admin_menu = _AdminMenu(title='Admin Menu')
 @admin_menu.register_close_callback
 def on_close_admin_menu(menu, player_index):
     """Enable default gameplay for the admin player who just closed the Admin menu."""
-    player = Player(player_index)
+    player = player_cache.from_index(player_index)
 
     # Remove the player from the Admin menu users storage
     admin_menu.users.remove(player.userid)
 
     # Equip the player
-    equip_player(player)
+    flashbang_equipper.equip(player)
 
     # Disable spawn protection for the player
     disable_damage_protection(player.index)
@@ -75,6 +78,7 @@ def on_select_admin_submenu(menu, player_index, option):
 # >> LISTENERS
 # =============================================================================
 @OnLevelInit
+@hook_stats.measure
 def on_level_init(map_name):
     """Clear the Admin menu users dict."""
     admin_menu.users.clear()
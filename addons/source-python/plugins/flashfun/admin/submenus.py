@@ -9,8 +9,6 @@
 #   Menus
 from menus import PagedMenu
 from menus import PagedOption
-#   Players
-from players.entity import Player
 
 # Script Imports
 #   Admin
@@ -18,6 +16,8 @@ from flashfun.admin import admin_menu
 #   Colors
 from flashfun.colors import MESSAGE_COLOR_ORANGE
 from flashfun.colors import MESSAGE_COLOR_WHITE
+#   Player Cache
+from flashfun.player_cache import player_cache
 #   Spawn Locations
 from flashfun.spawn_locations import SAFE_SPAWN_DISTANCE
 from flashfun.spawn_locations import spawn_locations_manager
@@ -38,12 +38,11 @@ SPAWN_LOCATION_TOLERANCE_UNITS = 20.0
 # =============================================================================
 def add_spawn_location_at_player_location(player):
     """Add a the player's current location as a spawn location."""
-    # Get a list of the distance of all spawn locations to the player's current location
-    distances = [spawn_location.get_distance(player.origin) for spawn_location in spawn_locations_manager]
+    origin = player.origin
 
     # Add the player's current location, if it is far enough away from all other spawn locations
-    if not distances or min(distances) >= SAFE_SPAWN_DISTANCE:
-        spawn_locations_manager.append(SpawnLocation.from_player_location(player))
+    if not spawn_locations_manager.grid.any_within(origin.x, origin.y, origin.z, SAFE_SPAWN_DISTANCE):
+        spawn_locations_manager.add_spawn_location(SpawnLocation.from_player_location(player))
 
         # Tell the player about the addition
         tell_player(
@@ -59,25 +58,43 @@ def add_spawn_location_at_player_location(player):
 def remove_spawn_location_at_player_location(player):
     """Remove the spawn location at the player's current location."""
     # Find the spawn location closest to the player's current location
-    for spawn_location in spawn_locations_manager.copy():
-        if spawn_location in spawn_locations_manager and\
-                spawn_location.get_distance(player.origin) < SPAWN_LOCATION_TOLERANCE_UNITS:
+    origin = player.origin
+    nearest = spawn_locations_manager.grid.nearest(origin.x, origin.y, origin.z)
 
-            # Store its position
-            position = spawn_locations_manager.index(spawn_location) + 1
+    # Remove it, if the player is standing on it
+    if nearest is not None and nearest[1] < SPAWN_LOCATION_TOLERANCE_UNITS ** 2:
+        index = nearest[0]
+        spawn_locations_manager.remove_spawn_location(index)
+
+        # Tell the player about the removal
+        tell_player(
+            player,
+            f'{spawn_locations_manager_menu.title}: Spawn Location {MESSAGE_COLOR_WHITE}#{index + 1}'
+            f' {MESSAGE_COLOR_ORANGE}has been removed.'
+        )
+
+    # Send the spawn locations manager menu back to the player
+    spawn_locations_manager_menu.send(player.index)
 
-            # Remove it from the spawn location list
-            spawn_locations_manager.remove(spawn_location)
 
-            # Tell the player about the removal
-            tell_player(
-                player,
-                f'{spawn_locations_manager_menu.title}: Spawn Location {MESSAGE_COLOR_WHITE}#{position}'
-                f' {MESSAGE_COLOR_ORANGE}has been removed.'
-            )
+def undo_spawn_location_change(player):
+    """Undo the last spawn location addition or removal."""
+    record = spawn_locations_manager.undo()
 
-            # Break the loop
-            break
+    # Tell the player about it
+    if record is not None:
+        action = 'addition' if record['op'] == 'add' else 'removal'
+        tell_player(
+            player,
+            f'{spawn_locations_manager_menu.title}: The {action} of Spawn Location'
+            f' {MESSAGE_COLOR_WHITE}#{record["index"] + 1} {MESSAGE_COLOR_ORANGE}has been undone.'
+        )
+
+    elif spawn_locations_manager.is_saving:
+        tell_player(player, f'{spawn_locations_manager_menu.title}: Spawn Locations are being saved.')
+
+    else:
+        tell_player(player, f'{spawn_locations_manager_menu.title}: Nothing to undo.')
 
     # Send the spawn locations manager menu back to the player
     spawn_locations_manager_menu.send(player.index)
@@ -93,7 +110,7 @@ def save_spawn_locations(player):
     spawn_locations_manager.save()
 
     # Tell the player about it
-    tell_player(player, f'{spawn_locations_manager_menu.title}: Spawn Locations have been saved.')
+    tell_player(player, f'{spawn_locations_manager_menu.title}: Spawn Locations are being saved.')
 
     # Send the spawn locations manager menu back to the player
     spawn_locations_manager_menu.send(player.index)
@@ -104,6 +121,7 @@ spawn_locations_manager_menu = PagedMenu(
     [
         PagedOption('Add', add_spawn_location_at_player_location),
         PagedOption('Remove', remove_spawn_location_at_player_location),
+        PagedOption('Undo', undo_spawn_location_change),
         ' ',
         PagedOption('List', send_spawn_locations_list_to_player),
         ' ',
@@ -124,21 +142,25 @@ _spawn_locations_list_menu = PagedMenu(title='Spawn Locations List')
 # =============================================================================
 @_spawn_locations_list_menu.register_build_callback
 def on_spawn_locations_list_menu_build(menu, player_index):
-    """Reload the menu with all available spawn locations."""
-    menu.clear()
-    menu.extend([
-        PagedOption(f'#{index + 1}', spawn_location) for index, spawn_location in enumerate(spawn_locations_manager)]
-    )
+    """Keep one option per available spawn location in the menu."""
+    count = len(spawn_locations_manager)
+
+    # Options only store the position of their spawn location, so only options at the end have to be added or removed
+    if len(menu) > count:
+        del menu[count:]
+    else:
+        menu.extend([PagedOption(f'#{index + 1}', index) for index in range(len(menu), count)])
 
 
 @_spawn_locations_list_menu.register_select_callback
 def on_spawn_locations_list_menu_select(menu, player_index, option):
     """Spawn the player at the selected location."""
     # Get a PlayerEntity instance for the player
-    player = Player(player_index)
+    player = player_cache.from_index(player_index)
 
-    # Move player to the chosen spawn location
-    option.value.move_player(player)
+    # Move player to the chosen spawn location, if it hasn't been removed in the meantime
+    if option.value < len(spawn_locations_manager):
+        spawn_locations_manager[option.value].move_player(player)
 
     # Send the Spawn Locations Manager menu to the player
     spawn_locations_manager_menu.send(player.index)
@@ -157,7 +179,7 @@ def on_spawn_locations_list_menu_close(menu, player_index):
 def on_spawn_locations_manager_menu_select(menu, player_index, option):
     """Handle the selected option."""
     # Get a PlayerEntity instance for the player
-    player = Player(player_index)
+    player = player_cache.from_index(player_index)
 
     # Call the callback function from `option` on `player`
     option.value(player)
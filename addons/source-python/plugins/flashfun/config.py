@@ -40,12 +40,53 @@ with ConfigManager(info.name, cvar_prefix=f'{info.name}_') as config:
         'The respawn delay in seconds.'
     )
 
+    cvar_respawn_budget = config.cvar(
+        'respawn_budget',
+        4,
+        'The maximum number of players respawned per tick, the others are respawned in the following ticks'
+        ' (0 = no limit).'
+    )
+
+    cvar_respawn_max_wait = config.cvar(
+        'respawn_max_wait',
+        0.5,
+        'The maximum time in seconds players wait beyond the respawn delay because of the respawn budget.'
+    )
+
     cvar_spawn_protection_time = config.cvar(
         'spawn_protection_time',
         3,
         'The spawn protection time in seconds.'
     )
 
+    cvar_spawn_location_backend = config.cvar(
+        'spawn_location_backend',
+        'grid',
+        'The spawn location search backend: grid, numpy (requires NumPy, falls back to grid; slower than grid in the'
+        ' random mode and only meant for comparison there, faster in the scored mode).'
+    )
+
+    cvar_spawn_location_mode = config.cvar(
+        'spawn_location_mode',
+        'random',
+        'The spawn location selection mode: random (any safe spawn location),'
+        ' scored (safe spawn locations far away from enemies, random until the distances between all spawn locations'
+        ' have been calculated in the background).'
+    )
+
+    cvar_spawn_location_randomness = config.cvar(
+        'spawn_location_randomness',
+        0.25,
+        'The randomness factor for the scored spawn location selection mode'
+        ' (0.0 = always the farthest away from enemies, 1.0 = any safe spawn location).'
+    )
+
+    cvar_max_world_weapons = config.cvar(
+        'max_world_weapons',
+        32,
+        'The maximum number of dropped weapons waiting to be removed, the oldest ones are removed early (0 = no limit).'
+    )
+
     config.section('PLAYER REWARDS', '=')
 
     cvar_enable_player_rewards = config.cvar(
@@ -54,6 +95,12 @@ with ConfigManager(info.name, cvar_prefix=f'{info.name}_') as config:
         'Enable player rewards (0 disable).'
     )
 
+    cvar_multi_kill_window = config.cvar(
+        'multi_kill_window',
+        3.0,
+        'The time in seconds between two kills for them to count as a multi-kill.'
+    )
+
     config.section('SAY COMMANDS', '=')
 
     cvar_admin_saycommand = config.cvar(
@@ -0,0 +1,178 @@
+# ../flashfun/entity_actions.py
+
+"""Provides the actions taken on map entities as soon as they spawn."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Contextlib
+from contextlib import suppress
+
+# Site-Packages Imports
+#   ConfigObj
+from configobj import ConfigObj
+from configobj import ConfigObjError
+
+# Source.Python Imports
+#   Core
+from core import GAME_NAME
+from core import echo_console
+#   Engines
+from engines.server import global_vars
+#   Entities
+from entities.entity import Entity
+#   Listeners
+from listeners import OnLevelInit
+from listeners import OnTick
+#   Paths
+from paths import PLUGIN_DATA_PATH
+
+# Plugin Imports
+#   Info
+from flashfun.info import info
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Actions which can be taken on spawned entities
+ENTITY_ACTION_IGNORE = 'ignore'
+ENTITY_ACTION_REMOVE = 'remove'
+ENTITY_ACTION_DISABLE = 'disable'
+
+ENTITY_ACTIONS = (ENTITY_ACTION_IGNORE, ENTITY_ACTION_REMOVE, ENTITY_ACTION_DISABLE)
+
+# Actions used if the entity actions file doesn't exist (classnames ending with '*' match all classnames they prefix)
+DEFAULT_ENTITY_ACTIONS = {
+    'hostage_entity': ENTITY_ACTION_REMOVE,
+    'func_*': ENTITY_ACTION_DISABLE,
+}
+
+# Name of the entity actions file section which applies to all maps
+DEFAULT_SECTION = 'default'
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _EntityActions(object):
+    """Class used to look up the action to take on spawned entities by their classname.
+
+        * the actions of the entity actions file's `default` section can be overridden per map
+        * the action found for each classname is remembered, so prefixes are only matched once per classname
+        * entities to disable are collected and disabled once at the end of the tick
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store the actions for exact classnames and for classname prefixes (longest prefix first)
+        self._exact = dict()
+        self._prefixes = list()
+
+        # Store the action found for each classname
+        self._memo = dict()
+
+        # Store the indexes of the entities to disable
+        self._pending_disable = list()
+
+    def load(self, map_name):
+        """Compile the actions for the map from the entity actions file."""
+        path = PLUGIN_DATA_PATH.joinpath(info.name, 'entity_actions', f'{GAME_NAME}.ini')
+
+        try:
+            config = ConfigObj(path) if path.exists() else {DEFAULT_SECTION: DEFAULT_ENTITY_ACTIONS}
+        except ConfigObjError as error:
+            echo_console(f'[{info.verbose_name}] Could not load the entity actions: {error!r}')
+            config = {DEFAULT_SECTION: DEFAULT_ENTITY_ACTIONS}
+
+        # Let the map's actions override the default actions
+        actions = dict(config.get(DEFAULT_SECTION, {}))
+        actions.update(config.get(map_name, {}))
+
+        exact = dict()
+        prefixes = dict()
+
+        for classname, action in actions.items():
+            action = str(action).strip().lower()
+
+            if action not in ENTITY_ACTIONS:
+                echo_console(f'[{info.verbose_name}] Ignoring invalid entity action "{classname} = {action}".')
+                continue
+
+            if classname.endswith('*'):
+                prefixes[classname[:-1]] = action
+            else:
+                exact[classname] = action
+
+        self._exact = exact
+        self._prefixes = sorted(prefixes.items(), key=lambda item: len(item[0]), reverse=True)
+        self._memo.clear()
+        self._pending_disable.clear()
+
+    def get_action(self, classname):
+        """Return the action to take on entities with the classname."""
+        action = self._memo.get(classname)
+
+        if action is None:
+            action = self._exact.get(classname)
+
+            if action is None:
+                action = next(
+                    (action for prefix, action in self._prefixes if classname.startswith(prefix)), ENTITY_ACTION_IGNORE
+                )
+
+            self._memo[classname] = action
+
+        return action
+
+    def handle(self, base_entity):
+        """Take the action for the spawned entity."""
+        action = self.get_action(base_entity.classname)
+
+        if action == ENTITY_ACTION_IGNORE:
+            return
+
+        if action == ENTITY_ACTION_REMOVE:
+            base_entity.remove()
+
+        else:
+            with suppress(ValueError):
+                self._pending_disable.append(base_entity.index)
+
+    def disable_pending(self):
+        """Disable all entities which have spawned since the last call."""
+        if not self._pending_disable:
+            return
+
+        indexes, self._pending_disable = self._pending_disable, list()
+
+        for index in indexes:
+            with suppress(ValueError):
+                Entity(index).call_input('Disable')
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+entity_actions = _EntityActions()
+entity_actions.load(global_vars.map_name)
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Compile the actions for the new map."""
+    entity_actions.load(map_name)
+
+
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Disable the entities which have spawned during the last tick."""
+    entity_actions.disable_pending()
@@ -0,0 +1,106 @@
+# ../flashfun/flashbangs.py
+
+"""Provides equipping players with flashbang grenades."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python Imports
+#   Listeners
+from listeners import OnClientDisconnect
+from listeners import OnLevelInit
+
+# Plugin Imports
+#   Scheduler
+from flashfun.scheduler import scheduler
+#   Stats
+from flashfun.stats import hook_stats
+#   Streaks
+from flashfun.streaks import MAX_PLAYER_SLOTS
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Flashbang grenade classname
+FLASHBANG_CLASSNAME = 'weapon_flashbang'
+
+# Time after which a player who has thrown their flashbang grenade gets a new one (in seconds)
+FLASHBANG_REEQUIP_DELAY = 1.0
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _FlashbangEquipper(object):
+    """Class used to keep every player equipped with a flashbang grenade.
+
+        * whether a player owns a flashbang is tracked per player slot from throw, pickup and death events,
+          so the player's weapons are only looked up on spawn, since they can be removed without a death
+          (i.e. on round restarts)
+        * a throw schedules one re-equip per player, another throw replaces it instead of adding another one
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store whether the player in each slot owns a flashbang
+        self._owned = bytearray(MAX_PLAYER_SLOTS)
+
+    def owns_flashbang(self, index):
+        """Return whether the player owns a flashbang."""
+        return bool(self._owned[index])
+
+    def equip(self, player):
+        """Give the player a flashbang, if they don't already own one."""
+        if self._owned[player.index]:
+            return
+
+        player.give_named_item(FLASHBANG_CLASSNAME)
+        self._owned[player.index] = 1
+
+    def on_spawn(self, player):
+        """Give the spawning player a flashbang, if they don't already own one."""
+        self._owned[player.index] = player.get_weapon(FLASHBANG_CLASSNAME) is not None
+        self.equip(player)
+
+    def on_picked_up(self, index):
+        """Remember the flashbang the player has picked up, which replaces their pending re-equip."""
+        self._owned[index] = 1
+        scheduler.cancel((index, 'equip'))
+
+    def on_thrown(self, player):
+        """Re-equip the player after they have thrown their flashbang."""
+        self._owned[player.index] = 0
+        scheduler.schedule(FLASHBANG_REEQUIP_DELAY, self.equip, (player,), key=(player.index, 'equip'))
+
+    def on_removed(self, index):
+        """Forget the player's flashbang (i.e. because they have died or all their weapons have been removed)."""
+        self._owned[index] = 0
+        scheduler.cancel((index, 'equip'))
+
+    def clear(self):
+        """Forget all flashbangs."""
+        self._owned[:] = bytes(MAX_PLAYER_SLOTS)
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+flashbang_equipper = _FlashbangEquipper()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Forget the disconnecting player's flashbang."""
+    flashbang_equipper.on_removed(index)
+
+
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Forget all flashbangs, since all players are going to spawn without weapons."""
+    flashbang_equipper.clear()
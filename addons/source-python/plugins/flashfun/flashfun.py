@@ -12,17 +12,20 @@ from contextlib import suppress
 # Source.Python Imports
 #   Commands
 from commands.typed import TypedSayCommand
+from commands.typed import TypedServerCommand
 #   Core
 from core import OutputReturn
+from core import echo_console
 #   Entities
-from entities.entity import Entity
 from entities.hooks import EntityPreHook
 from entities.hooks import EntityCondition
 #   Events
 from events import Event
 #   Listeners
 from listeners import OnEntitySpawned
+from listeners import OnLevelInit
 from listeners import OnServerOutput
+from listeners import OnTick
 #   Memory
 from memory import make_object
 #   Players
@@ -37,20 +40,49 @@ from flashfun.admin.submenus import spawn_locations_manager_menu
 #   Config
 from flashfun.config import cvar_admin_saycommand
 from flashfun.config import cvar_respawn_delay
+#   Entity Actions
+from flashfun.entity_actions import entity_actions
+#   Flashbangs
+from flashfun.flashbangs import FLASHBANG_CLASSNAME
+from flashfun.flashbangs import flashbang_equipper
 #   Info
 from flashfun.info import info
+#   Player Cache
+from flashfun.player_cache import player_cache
+#   Respawns
+from flashfun.respawns import respawn_queue
 #   Rewards
-from flashfun.rewards import player_attribute_rewards
-from flashfun.rewards import player_rewards_list
-from flashfun.rewards import weapon_rewards
+from flashfun.rewards import pending_rewards
+from flashfun.rewards import reward_rules
+#   Scheduler
+from flashfun.scheduler import scheduler
+#   Server Output
+from flashfun.server_output import server_output_filter
+#   Spawn Locations
+from flashfun.spawn_locations import spawn_location_dispatcher
+#   Stats
+from flashfun.stats import hook_stats
+#   Streaks
+from flashfun.streaks import streak_tracker
+#   Trace
+from flashfun.trace import trace_recorder
 #   Util
 from flashfun.util import enable_damage_protection
-from flashfun.util import equip_player
-from flashfun.util import handle_player_reward
-from flashfun.util import handle_weapon_reward
+from flashfun.util import death_queue
 from flashfun.util import handle_weapon_reward_properties
 from flashfun.util import prepare_player
 from flashfun.util import remove_weapon
+#   Weapon Sweeper
+from flashfun.weapon_sweeper import weapon_sweeper
+
+
+# =============================================================================
+# >> UNLOAD
+# =============================================================================
+def unload():
+    """Stop the spawn location worker thread and the trace recording."""
+    spawn_location_dispatcher.stop()
+    trace_recorder.stop()
 
 
 # =============================================================================
@@ -63,53 +95,78 @@ admin_menu.register_submenu(spawn_locations_manager_menu)
 # >> GAME EVENTS
 # =============================================================================
 @Event('player_spawn')
+@hook_stats.measure
 def on_player_spawn(game_event):
     """Prepare the spawning player."""
-    player = Player.from_userid(game_event['userid'])
+    player = player_cache.from_userid(game_event['userid'])
 
     if not player.dead and player.team > 1:
+        streak_tracker.on_spawn(player.index)
         prepare_player(player)
 
 
 @Event('player_death')
+@hook_stats.measure
 def on_player_death(game_event):
     """Respawn the victim and handle attacker rewards."""
     # Respawn the victim
-    victim = Player.from_userid(game_event['userid'])
-    victim.delay(int(cvar_respawn_delay), victim.spawn, (True, ))
+    victim = player_cache.from_userid(game_event['userid'])
+    scheduler.schedule(int(cvar_respawn_delay), respawn_queue.add, (victim.index,), key=(victim.index, 'respawn'))
+
+    # The victim has lost their flashbang
+    flashbang_equipper.on_removed(victim.index)
+
+    # Queue the death, with the attacker getting rewards if the attacker and the victim are not on the same team
+    attacker_index = None
 
-    # Handle attacker rewards, if the attacker and the victim are not on the same team
     with suppress(ValueError):
-        attacker = Player.from_userid(game_event['attacker'])
+        attacker = player_cache.from_userid(game_event['attacker'])
 
         if attacker.team != victim.team:
+            attacker_index = attacker.index
+
+    death_queue.add(victim.index, attacker_index)
+
 
-            # Handle attacker attribute rewards
-            for attr, values in player_attribute_rewards.items():
-                handle_player_reward(attacker, attr, abs(int(values['value'])), abs(int(values.get('max_value', 0))))
+@Event('item_pickup')
+@hook_stats.measure
+def on_item_pickup(game_event):
+    """Remember the flashbang the player has picked up, so they aren't re-equipped on top of it."""
+    classname = game_event['item']
 
-            # Handle weapon rewards
-            for basename, values in weapon_rewards.items():
-                handle_weapon_reward(attacker, values['type'], int(values['multiplier']), basename)
+    if not classname.startswith('weapon_'):
+        classname = f'weapon_{classname}'
+
+    if classname == FLASHBANG_CLASSNAME:
+        with suppress(ValueError):
+            flashbang_equipper.on_picked_up(player_cache.from_userid(game_event['userid']).index)
 
 
 @Event('weapon_fire')
+@hook_stats.measure
 def on_weapon_fire(game_event):
     """Handle re-equipping the player."""
-    # Get a Player object for the player
-    player = Player.from_userid(game_event['userid'])
+    classname = game_event['weapon']
 
-    # Get the Weapon object for the weapon the player is firing
-    weapon = player.get_weapon(game_event['weapon'])
+    if not classname.startswith('weapon_'):
+        classname = f'weapon_{classname}'
 
     # Re-equip the player with another flashbang grenade, if one has been thrown
-    if weapon.classname == 'weapon_flashbang':
-        player.delay(1.0, equip_player, (player,), cancel_on_level_end=True)
+    if classname == FLASHBANG_CLASSNAME:
+        flashbang_equipper.on_thrown(player_cache.from_userid(game_event['userid']))
+        return
+
+    # Skip weapons which can't run out of ammo, since players can only keep flashbangs and reward weapons
+    if classname not in reward_rules.allowed_weapons:
+        return
+
+    # Get the Weapon object for the weapon the player is firing
+    weapon = player_cache.from_userid(game_event['userid']).get_weapon(classname)
 
     # Remove the weapon if it is going to run out of ammo
-    with suppress(ValueError):
+    with suppress(ValueError, AttributeError):
         if weapon.clip == 1 and weapon.ammo == 0:
-            weapon.delay(0.2, weapon.remove)
+            scheduler.schedule(0.2, remove_weapon, (weapon.index,), key=(weapon.index, 'remove'))
 
 
 # =============================================================================
@@ -117,6 +174,7 @@ def on_weapon_fire(game_event):
 # =============================================================================
 @EntityPreHook(EntityCondition.is_bot_player, 'blind')
 @EntityPreHook(EntityCondition.is_human_player, 'blind')
+@hook_stats.measure
 def on_pre_blind(stack_data):
     """Block blinding players."""
     return False
@@ -124,6 +182,7 @@ def on_pre_blind(stack_data):
 
 @EntityPreHook(EntityCondition.is_bot_player, 'deafen')
 @EntityPreHook(EntityCondition.is_human_player, 'deafen')
+@hook_stats.measure
 def on_pre_deafen(stack_data):
     """Block deafening players."""
     return False
@@ -131,6 +190,7 @@ def on_pre_deafen(stack_data):
 
 @EntityPreHook(EntityCondition.is_bot_player, 'drop_weapon')
 @EntityPreHook(EntityCondition.is_human_player, 'drop_weapon')
+@hook_stats.measure
 def on_pre_drop_weapon(stack_data):
     """Remove the droppped weapon after about two seconds."""
     # Get a Player object for the first stack_data item
@@ -139,13 +199,18 @@ def on_pre_drop_weapon(stack_data):
     # Get the player's active weapon
     active_weapon = player.get_active_weapon()
 
-    # Remove the weapon after two seconds, if it is valid
+    # Remove the weapon after about two seconds, if it is valid
     if active_weapon is not None:
-        player.delay(2.0, remove_weapon, (player.get_active_weapon().index,), cancel_on_level_end=True)
+        weapon_sweeper.add(active_weapon.index)
+
+        # Forget the player's flashbang, if they have dropped it
+        if active_weapon.classname == FLASHBANG_CLASSNAME:
+            flashbang_equipper.on_removed(player.index)
 
 
 @EntityPreHook(EntityCondition.is_bot_player, 'bump_weapon')
 @EntityPreHook(EntityCondition.is_human_player, 'bump_weapon')
+@hook_stats.measure
 def on_pre_bump_weapon(stack_data):
     """Block bumping into another flashbang, if the player already owns one."""
     # Get a Player object from the first stack_data item
@@ -155,17 +220,25 @@ def on_pre_bump_weapon(stack_data):
     weapon = make_object(Weapon, stack_data[1])
 
     # Block bumping into the weapon and remove it later, if it is not a flashbang or a High Explosive grenade
-    if weapon.classname != 'weapon_flashbang':
+    if weapon.classname != FLASHBANG_CLASSNAME:
 
-        if (player.userid, weapon.classname) not in player_rewards_list:
-            weapon.delay(2.0, remove_weapon, (weapon.index,), cancel_on_level_end=True)
+        if (player.userid, weapon.classname) not in pending_rewards:
+            weapon_sweeper.add(weapon.index)
             return False
 
-        weapon.delay(0.2, handle_weapon_reward_properties, (weapon,))
+        scheduler.schedule(
+            0.2, handle_weapon_reward_properties, (weapon.index,),
+            key=(weapon.index, 'reward_properties'), replace=False
+        )
 
     # Block bumping into the weapon and remove it later, if the player is currently using the Admin menu
     if player.userid in admin_menu.users:
-        weapon.delay(2.0, remove_weapon, (weapon.index,), cancel_on_level_end=True)
+        weapon_sweeper.add(weapon.index)
+        return False
+
+    # Block bumping into another flashbang and remove it later, if the player already owns one
+    if weapon.classname == FLASHBANG_CLASSNAME and flashbang_equipper.owns_flashbang(player.index):
+        weapon_sweeper.add(weapon.index)
         return False
 
 
@@ -176,15 +249,18 @@ def on_pre_bump_weapon(stack_data):
 def on_saycommand_admin(command_info):
     """Send the Admin menu to the player."""
     # Get a PlayerEntity instance for the player
-    player = Player(command_info.index)
+    player = player_cache.from_index(command_info.index)
 
     # Protect the player indefinitely
+    scheduler.cancel((player.index, 'spawn_protection'))
     enable_damage_protection(player)
 
     # Remove all the player's weapons
     for weapon in player.weapons():
         weapon.remove()
 
+    flashbang_equipper.on_removed(player.index)
+
     # Send the Admin menu to the player
     admin_menu.users.append(player.userid)
     admin_menu.send(command_info.index)
@@ -193,28 +269,112 @@ def on_saycommand_admin(command_info):
     return False
 
 
+# =============================================================================
+# >> SERVER COMMANDS
+# =============================================================================
+@TypedServerCommand(f'{info.name}_stats')
+def on_servercommand_stats(command_info):
+    """Print the hook latency histograms and the queue statistics."""
+    state = 'on' if hook_stats.enabled else 'off'
+    echo_console(f'[{info.verbose_name}] Hook latency in milliseconds (measuring is {state}):')
+
+    for line in hook_stats.get_report():
+        echo_console(line)
+
+    echo_console(
+        f'[{info.verbose_name}] Spawn location jobs: {spawn_location_dispatcher.queue_depth} waiting,'
+        f' {spawn_location_dispatcher.latency_last * 1000:.3f} ms last latency,'
+        f' {spawn_location_dispatcher.latency_average * 1000:.3f} ms average latency,'
+        f' {spawn_location_dispatcher.latency_max * 1000:.3f} ms max latency'
+    )
+    echo_console(
+        f'[{info.verbose_name}] Respawns: {len(respawn_queue)} waiting, {respawn_queue.length_max} max waiting,'
+        f' {respawn_queue.forced} over budget, {respawn_queue.wait_average * 1000:.0f} ms average wait,'
+        f' {respawn_queue.wait_max * 1000:.0f} ms max wait'
+    )
+    pending_by_kind = ', '.join(f'{kind}: {count}' for kind, count in sorted(scheduler.get_pending_by_kind().items()))
+    echo_console(
+        f'[{info.verbose_name}] Scheduled tasks: {scheduler.pending} waiting'
+        + (f' ({pending_by_kind})' if pending_by_kind else '')
+    )
+    echo_console(
+        f'[{info.verbose_name}] Dropped weapons: {len(weapon_sweeper)} waiting, {weapon_sweeper.removed} removed'
+    )
+    blocked_by_text = ', '.join(f'{text!r}: {hits}' for text, hits in server_output_filter.get_hits().items() if hits)
+    echo_console(
+        f'[{info.verbose_name}] Server output: {server_output_filter.lines} lines checked,'
+        f' {sum(server_output_filter.hits)} blocked' + (f' ({blocked_by_text})' if blocked_by_text else '')
+    )
+
+
+@TypedServerCommand([f'{info.name}_stats', 'on'])
+def on_servercommand_stats_on(command_info):
+    """Start measuring the hooks."""
+    hook_stats.enabled = True
+    echo_console(f'[{info.verbose_name}] Measuring hooks.')
+
+
+@TypedServerCommand([f'{info.name}_stats', 'off'])
+def on_servercommand_stats_off(command_info):
+    """Stop measuring the hooks."""
+    hook_stats.enabled = False
+    echo_console(f'[{info.verbose_name}] Stopped measuring hooks.')
+
+
+@TypedServerCommand([f'{info.name}_stats', 'reset'])
+def on_servercommand_stats_reset(command_info):
+    """Drop the counted hook calls."""
+    hook_stats.reset()
+    echo_console(f'[{info.verbose_name}] The hook statistics have been reset.')
+
+
+@TypedServerCommand([f'{info.name}_trace', 'start'])
+def on_servercommand_trace_start(command_info, name:str=None):
+    """Start recording the game events into a trace file."""
+    path = trace_recorder.start(name)
+    echo_console(f'[{info.verbose_name}] Recording game events to {path}.')
+
+
+@TypedServerCommand([f'{info.name}_trace', 'stop'])
+def on_servercommand_trace_stop(command_info):
+    """Stop recording the game events."""
+    if not trace_recorder.recording:
+        echo_console(f'[{info.verbose_name}] No game events are being recorded.')
+        return
+
+    trace_recorder.stop()
+    echo_console(f'[{info.verbose_name}] Recorded {trace_recorder.records} records to {trace_recorder.path}.')
+
+
 # =============================================================================
 # >> LISTENERS
 # =============================================================================
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Process the deaths of the last tick."""
+    death_queue.process()
+
+
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Drop the deaths queued on the previous map."""
+    death_queue.clear()
+
+
 @OnEntitySpawned
+@hook_stats.measure
 def on_entity_spawned(base_entity):
     """Remove hostage entities and disable map entity functions as soon as they spawn."""
-    if base_entity.classname == 'hostage_entity':
-        base_entity.remove()
-
-    elif base_entity.classname.startswith('func_'):
-        with suppress(ValueError):
-            entity = Entity(base_entity.index)
-            entity.call_input('Disable')
+    entity_actions.handle(base_entity)
 
 
 @OnServerOutput
+@hook_stats.measure
 def on_server_output(severity, msg):
     """Block server warnings this plugin causes."""
-    if 'bot spawned outside of a buy zone' in msg:
-        return OutputReturn.BLOCK
-
-    if 'hostage position' in msg:
+    if server_output_filter.match(msg):
         return OutputReturn.BLOCK
 
     return OutputReturn.CONTINUE
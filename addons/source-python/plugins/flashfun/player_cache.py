@@ -0,0 +1,116 @@
+# ../flashfun/player_cache.py
+
+"""Provides a cache of Player objects shared by all event handlers."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Contextlib
+from contextlib import suppress
+
+# Source.Python Imports
+#   Listeners
+from listeners import OnClientActive
+from listeners import OnClientDisconnect
+from listeners import OnLevelEnd
+#   Players
+from players.entity import Player
+
+# Plugin Imports
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _PlayerCache(object):
+    """Class used to keep one Player object per connected player.
+
+        * players are looked up by userid or index and only created once
+        * players are removed when they disconnect and when the map ends
+        * lookups of invalid players raise ValueError, just like creating a Player object
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self._by_index = dict()
+        self._by_userid = dict()
+
+    def __len__(self):
+        """Return the number of cached players."""
+        return len(self._by_index)
+
+    def from_index(self, index):
+        """Return the Player object for the player index."""
+        player = self._by_index.get(index)
+
+        if player is None:
+            player = self._add(Player(index))
+
+        return player
+
+    def from_userid(self, userid):
+        """Return the Player object for the userid."""
+        player = self._by_userid.get(userid)
+
+        if player is None:
+            player = self._add(Player.from_userid(userid))
+
+        return player
+
+    def discard(self, index):
+        """Remove the player with the index from the cache, if they are cached."""
+        player = self._by_index.pop(index, None)
+
+        if player is not None:
+            self._by_userid.pop(player.userid, None)
+
+    def clear(self):
+        """Remove all players from the cache."""
+        self._by_index.clear()
+        self._by_userid.clear()
+
+    def _add(self, player):
+        """Store and return the Player object."""
+        # Drop the previous player who had the same index
+        self.discard(player.index)
+
+        self._by_index[player.index] = player
+        self._by_userid[player.userid] = player
+
+        return player
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+player_cache = _PlayerCache()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnClientActive
+@hook_stats.measure
+def on_client_active(index):
+    """Cache the player as soon as they are in the game."""
+    player_cache.discard(index)
+
+    with suppress(ValueError):
+        player_cache.from_index(index)
+
+
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Remove the disconnecting player from the cache."""
+    player_cache.discard(index)
+
+
+@OnLevelEnd
+@hook_stats.measure
+def on_level_end():
+    """Remove all players from the cache, since all of them are going to reconnect."""
+    player_cache.clear()
@@ -0,0 +1,130 @@
+# ../flashfun/respawns.py
+
+"""Provides respawning dead players spread over consecutive ticks."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Source.Python Imports
+#   Engines
+from engines.server import global_vars
+#   Listeners
+from listeners import OnClientDisconnect
+from listeners import OnLevelEnd
+from listeners import OnTick
+
+# Plugin Imports
+#   Config
+from flashfun.config import cvar_respawn_budget
+from flashfun.config import cvar_respawn_max_wait
+#   Stats
+from flashfun.stats import hook_stats
+#   Util
+from flashfun.util import respawn_player
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _RespawnQueue(object):
+    """Class used to respawn players whose respawn delay has passed, a limited number per tick.
+
+        * players are respawned in the order their respawn delay has passed
+        * at most `flashfun_respawn_budget` players are respawned per tick, the others wait for the following ticks
+        * players who have waited `flashfun_respawn_max_wait` seconds are respawned regardless of the budget
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store the time each player has been queued at: {index: curtime}, in the order they have been queued
+        self._queued = dict()
+
+        # Store queue length and waiting time statistics
+        self.respawned = 0
+        self.forced = 0
+        self.length_max = 0
+        self.wait_max = 0.0
+        self.wait_total = 0.0
+
+    def __len__(self):
+        """Return the number of players waiting for their respawn."""
+        return len(self._queued)
+
+    def add(self, player_index):
+        """Queue the player for respawning, unless they are already queued."""
+        if player_index in self._queued:
+            return
+
+        self._queued[player_index] = global_vars.curtime
+        self.length_max = max(self.length_max, len(self._queued))
+
+    def discard(self, player_index):
+        """Stop waiting for the player's respawn (i.e. because they have disconnected)."""
+        self._queued.pop(player_index, None)
+
+    def process(self):
+        """Respawn the players queued first, within the respawn budget."""
+        if not self._queued:
+            return
+
+        now = global_vars.curtime
+        budget = int(cvar_respawn_budget)
+        max_wait = float(cvar_respawn_max_wait)
+        count = 0
+
+        while self._queued:
+            player_index, queued_time = next(iter(self._queued.items()))
+            wait = now - queued_time
+
+            if 0 < budget <= count:
+                if wait < max_wait:
+                    break
+
+                self.forced += 1
+
+            del self._queued[player_index]
+            respawn_player(player_index)
+            count += 1
+
+            self.respawned += 1
+            self.wait_max = max(self.wait_max, wait)
+            self.wait_total += wait
+
+    def clear(self):
+        """Stop waiting for all respawns."""
+        self._queued.clear()
+
+    @property
+    def wait_average(self):
+        """Return the average time players have waited beyond their respawn delay (in seconds)."""
+        return self.wait_total / self.respawned if self.respawned else 0.0
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+respawn_queue = _RespawnQueue()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Respawn the players queued first."""
+    respawn_queue.process()
+
+
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Stop waiting for the disconnecting player's respawn."""
+    respawn_queue.discard(index)
+
+
+@OnLevelEnd
+@hook_stats.measure
+def on_level_end():
+    """Stop waiting for all respawns, since all players are going to reconnect."""
+    respawn_queue.clear()
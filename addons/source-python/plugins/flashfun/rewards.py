@@ -5,15 +5,36 @@
 # =============================================================================
 # >> IMPORTS
 # =============================================================================
+# Python Imports
+#   Collections
+from collections import deque
+#   Contextlib
+from contextlib import suppress
+#   Hashlib
+from hashlib import sha1
+#   OS
+import os
+
 # Site-Packages Imports
 #   ConfigObj
 from configobj import ConfigObj
+from configobj import ConfigObjError
 
 # Source.Python Imports
 #   Core
 from core import GAME_NAME
+from core import echo_console
+#   Engines
+from engines.server import global_vars
+#   Listeners
+from listeners import OnClientDisconnect
+from listeners import OnLevelInit
+from listeners.tick import GameThread
+from listeners.tick import Repeat
 #   Paths
 from paths import PLUGIN_DATA_PATH
+#   Players
+from players.helpers import userid_from_index
 #   Weapons
 from weapons.manager import weapon_manager
 
@@ -22,27 +43,384 @@ from weapons.manager import weapon_manager
 from flashfun.config import cvar_enable_player_rewards
 #   Info
 from flashfun.info import info
+#   Stats
+from flashfun.stats import hook_stats
+#   Streaks
+from flashfun.streaks import STREAK_TRIGGERS
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Maximum value of a player attribute reward without a maximum value
+DEFAULT_MAX_ATTRIBUTE_VALUE = 999
+
+# Numeric player properties which can be rewarded, and which can trigger weapon rewards besides the streak counters
+PLAYER_PROPERTIES = ('health', 'max_health', 'armor', 'deaths', 'assists', 'mvps', 'score', 'cash')
+
+# Time a rewarded weapon may take to be picked up by the player (in seconds)
+PENDING_REWARD_EXPIRY_TIME = 5.0
+
+# Interval in which the reward config file is checked for changes (in seconds)
+REWARDS_CONFIG_POLL_INTERVAL = 2.0
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class AttributeReward(object):
+    """Class used to describe a player attribute reward (i.e. health, armor)."""
+
+    __slots__ = ('attribute', 'gain', 'max_value')
+
+    def __init__(self, attribute, gain, max_value):
+        """Object initialization."""
+        self.attribute = attribute
+        self.gain = gain
+        self.max_value = max_value
+
+
+class WeaponReward(object):
+    """Class used to describe a weapon reward, given each time a player property reaches a multiple of `multiplier`."""
+
+    __slots__ = ('basename', 'classname', 'trigger', 'multiplier', 'clip', 'ammo')
+
+    def __init__(self, basename, classname, trigger, multiplier, clip=None, ammo=None):
+        """Object initialization."""
+        self.basename = basename
+        self.classname = classname
+        self.trigger = trigger
+        self.multiplier = multiplier
+
+        # Store the weapon properties to set (None keeps the weapon's own)
+        self.clip = clip
+        self.ammo = ammo
+
+
+class _RewardRules(object):
+    """Class used to compile the reward config into rules which are cheap to evaluate.
+
+        * attribute rewards without a gain are left out
+        * sections which are neither a weapon nor a numeric player property are invalid
+        * weapon rewards are indexed by their trigger (player property) and their multiplier
+        * weapon rewards with a trigger which is neither a streak counter nor a numeric player property are invalid
+        * weapon classnames are resolved once
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self.attribute_rewards = tuple()
+
+        # Store the weapon rewards: {trigger: {multiplier: (WeaponReward, ...)}}
+        self.weapon_rewards = dict()
+
+        # Store the weapon rewards by their weapon classname
+        self._weapon_rewards_by_classname = dict()
+
+        # Store the compiled values of each reward config section, to report changes
+        self._sections = dict()
+
+    @classmethod
+    def from_config(cls, config):
+        """Return new rules compiled from the reward config sections and a list of invalid sections."""
+        rules = cls()
+        errors = list()
+        attribute_rewards = list()
+        weapon_rewards = dict()
+
+        for name, values in config.items():
+            try:
+                if name not in weapon_manager:
+                    if name not in PLAYER_PROPERTIES:
+                        raise ValueError('neither a weapon nor a numeric player property')
+
+                    gain = abs(int(values['value']))
+                    max_value = abs(int(values.get('max_value', 0))) or DEFAULT_MAX_ATTRIBUTE_VALUE
+                    rules._sections[name] = (gain, max_value)
+
+                    if gain:
+                        attribute_rewards.append(AttributeReward(name, gain, max_value))
+
+                    continue
+
+                trigger = values['type']
+
+                if trigger not in STREAK_TRIGGERS and trigger not in PLAYER_PROPERTIES:
+                    raise ValueError(f'unknown type {trigger!r}')
+
+                multiplier = abs(int(values['multiplier']))
+
+                if not multiplier:
+                    raise ValueError('multiplier must not be 0')
+
+                reward = WeaponReward(
+                    weapon_manager[name].basename, weapon_manager[name].name, trigger, multiplier,
+                    int(values['clip']) if 'clip' in values else None,
+                    int(values['ammo']) if 'ammo' in values else None
+                )
+
+            except (KeyError, TypeError, ValueError, AttributeError) as error:
+                errors.append(f'"{name}": {error!r}')
+                continue
+
+            rules._sections[name] = (reward.trigger, reward.multiplier, reward.clip, reward.ammo)
+            weapon_rewards.setdefault(reward.trigger, dict()).setdefault(reward.multiplier, list()).append(reward)
+            rules._weapon_rewards_by_classname[reward.classname] = reward
+
+        rules.attribute_rewards = tuple(attribute_rewards)
+        rules.weapon_rewards = {
+            trigger: {multiplier: tuple(rewards) for multiplier, rewards in by_multiplier.items()}
+            for trigger, by_multiplier in weapon_rewards.items()
+        }
+
+        return rules, errors
+
+    def swap(self, rules):
+        """Replace all rules with the compiled `rules` and return the added, removed and changed reward names."""
+        old_sections, new_sections = self._sections, rules._sections
+
+        changes = (
+            sorted(new_sections.keys() - old_sections.keys()),
+            sorted(old_sections.keys() - new_sections.keys()),
+            sorted(
+                name for name in new_sections.keys() & old_sections.keys() if new_sections[name] != old_sections[name]
+            )
+        )
+
+        # Replace the rules all at once
+        self.attribute_rewards = rules.attribute_rewards
+        self.weapon_rewards = rules.weapon_rewards
+        self._weapon_rewards_by_classname = rules._weapon_rewards_by_classname
+        self._sections = rules._sections
+
+        return changes
+
+    def get_weapon_rewards(self, player, get_value=getattr):
+        """Yield all weapon rewards the player has earned with their current trigger values.
+
+        `get_value` returns the player's value for a trigger, reading the player property by default.
+        """
+        for trigger, by_multiplier in self.weapon_rewards.items():
+
+            # Only respect values higher than zero
+            value = get_value(player, trigger)
+
+            if value <= 0:
+                continue
+
+            for multiplier, rewards in by_multiplier.items():
+                if value % multiplier == 0:
+                    yield from rewards
+
+    def get_weapon_reward(self, classname):
+        """Return the weapon reward for the weapon classname, or None."""
+        return self._weapon_rewards_by_classname.get(classname)
+
+    @property
+    def allowed_weapons(self):
+        """Return the classnames of all weapons which can be rewarded."""
+        return self._weapon_rewards_by_classname.keys()
+
+
+class _PendingRewards(object):
+    """Class used to keep track of rewarded weapons which the players have not picked up yet.
+
+        * entries are stored per userid and classname, so membership checks are O(1)
+        * entries expire after `PENDING_REWARD_EXPIRY_TIME` seconds
+        * entries of disconnecting players and of the previous map are removed
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store the expiry time of each pending reward: {userid: {classname: expiry time}}
+        self._pending = dict()
+
+    def __contains__(self, item):
+        """Return whether the (userid, classname) reward is pending and has not expired."""
+        userid, classname = item
+        expiry_time = self._pending.get(userid, {}).get(classname)
+
+        return expiry_time is not None and expiry_time > global_vars.curtime
+
+    def __len__(self):
+        """Return the number of stored pending rewards, including expired ones."""
+        return sum(map(len, self._pending.values()))
+
+    def add(self, userid, classname):
+        """Add a pending reward for the player."""
+        now = global_vars.curtime
+        rewards = self._pending.setdefault(userid, dict())
+
+        # Drop the player's expired rewards
+        for expired_classname in [key for key, expiry_time in rewards.items() if expiry_time <= now]:
+            del rewards[expired_classname]
+
+        rewards[classname] = now + PENDING_REWARD_EXPIRY_TIME
+
+    def discard(self, userid, classname):
+        """Remove a pending reward for the player, if any."""
+        rewards = self._pending.get(userid)
+
+        if rewards is not None:
+            rewards.pop(classname, None)
+
+            if not rewards:
+                del self._pending[userid]
+
+    def discard_player(self, userid):
+        """Remove all pending rewards for the player."""
+        self._pending.pop(userid, None)
+
+    def clear(self):
+        """Remove all pending rewards."""
+        self._pending.clear()
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+reward_rules = _RewardRules()
 
 
 # =============================================================================
 # >> REWARD CONFIG
 # =============================================================================
+class _RewardsConfigWatcher(object):
+    """Class used to load the reward config and reload it when its file changes.
+
+        * the file's modification time and size are checked on the game thread, which is cheap
+        * a changed file is parsed and compiled on a separate thread
+        * new rules replace the running ones on the game thread, invalid files are rejected
+    """
+
+    def __init__(self, path):
+        """Object initialization."""
+        self.path = path
+
+        # Store the modification time and size of the file, and the SHA-1 hash of the loaded contents
+        self._stat = None
+        self._source_hash = None
+
+        # Store the thread compiling the file, and its results: (hash, rules, errors)
+        self._thread = None
+        self._results = deque()
+
+        self._repeat = Repeat(self._poll)
+
+    def load(self):
+        """Load the reward config right away, ignoring invalid rewards."""
+        self._stat = self._get_stat()
+        source_hash, rules, errors = self._compile_file()
+
+        if rules is None:
+            _echo(f'Could not load the reward config: {", ".join(errors)}')
+            return
+
+        for error in errors:
+            _echo(f'Ignoring invalid reward {error}')
+
+        self._source_hash = source_hash
+        reward_rules.swap(rules)
+
+    def start(self):
+        """Start checking the file for changes."""
+        self._repeat.start(REWARDS_CONFIG_POLL_INTERVAL)
+
+    def _poll(self):
+        """Apply finished reloads and start a reload if the file has changed."""
+        while self._results:
+            self._apply(*self._results.popleft())
+
+        # Wait for the running reload to finish
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        stat = self._get_stat()
+
+        if stat == self._stat:
+            return
+
+        self._stat = stat
+        self._thread = GameThread(target=self._reload, daemon=True)
+        self._thread.start()
+
+    def _reload(self):
+        """Compile the file on the reload thread and hand the results to the game thread."""
+        self._results.append(self._compile_file())
+
+    def _compile_file(self):
+        """Return the SHA-1 hash of the file, the rules compiled from it and a list of errors."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+
+            rules, errors = _RewardRules.from_config(ConfigObj(data.decode('utf-8').splitlines()))
+
+        except (OSError, UnicodeDecodeError, ConfigObjError) as error:
+            return None, None, [repr(error)]
+
+        return sha1(data).digest(), rules, errors
+
+    def _apply(self, source_hash, rules, errors):
+        """Replace the running rules with valid reloaded ones and report the changes."""
+        if rules is None or errors:
+            _echo(f'Rejected the changed reward config, keeping the current rewards: {", ".join(errors)}')
+            return
+
+        # Skip if the file has been touched without changing it
+        if source_hash == self._source_hash:
+            return
+
+        self._source_hash = source_hash
+        added, removed, changed = reward_rules.swap(rules)
+
+        _echo(
+            f'Reloaded the reward config: added {", ".join(added) or "-"},'
+            f' removed {", ".join(removed) or "-"}, changed {", ".join(changed) or "-"}.'
+        )
+
+    def _get_stat(self):
+        """Return the modification time and size of the file, or None if it doesn't exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+
+def _echo(message):
+    """Print a prefixed message to the server console."""
+    echo_console(f'[{info.verbose_name}] {message}')
+
+
+# Load the reward config and watch it for changes, if player rewards are enabled
+rewards_config_watcher = _RewardsConfigWatcher(PLUGIN_DATA_PATH.joinpath(info.name, 'rewards', f'{GAME_NAME}.ini'))
+
 if int(cvar_enable_player_rewards):
-    _rewards_config_ini = ConfigObj(PLUGIN_DATA_PATH.joinpath(info.name, 'rewards', f'{GAME_NAME}.ini'))
-else:
-    _rewards_config_ini = dict()
+    rewards_config_watcher.load()
+    rewards_config_watcher.start()
 
 
 # =============================================================================
-# >> GET WEAPON AND PLAYER ATTRIBUTE REWARDS
+# >> WEAPON REWARDS THE PLAYERS HAVE NOT PICKED UP YET
 # =============================================================================
-weapon_rewards = {key: value for key, value in _rewards_config_ini.items() if key in weapon_manager}
-allowed_weapons = [weapon_manager[basename].name for basename in weapon_rewards]
-
-player_attribute_rewards = {key: value for key, value in _rewards_config_ini.items() if key not in weapon_manager}
+pending_rewards = _PendingRewards()
 
 
 # =============================================================================
-# >> LIST OF PLAYERS WHO RECEIVED A WEAPON REWARD
+# >> LISTENERS
 # =============================================================================
-player_rewards_list = list()
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Remove the pending rewards of the disconnecting player."""
+    with suppress(ValueError):
+        pending_rewards.discard_player(userid_from_index(index))
+
+
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Remove all pending rewards of the previous map."""
+    pending_rewards.clear()
@@ -0,0 +1,298 @@
+# ../flashfun/scheduler.py
+
+"""Provides a timer wheel running all delayed plugin tasks."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Collections
+from collections import Counter
+#   Contextlib
+from contextlib import suppress
+#   Math
+from math import ceil
+
+# Source.Python Imports
+#   Engines
+from engines.server import global_vars
+#   Hooks
+from hooks.exceptions import except_hooks
+#   Listeners
+from listeners import OnClientDisconnect
+from listeners import OnEntityDeleted
+from listeners import OnLevelEnd
+from listeners import OnTick
+
+# Plugin Imports
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Time each slot of the lowest wheel stands for (in seconds)
+TIMER_WHEEL_RESOLUTION = 1 / 64
+
+# Number of slots per wheel (as a power of two) and number of wheels
+#   the wheels cover 64 slots (1 second), 64 * 64 slots (64 seconds) and 64 * 64 * 64 slots (about 68 minutes)
+TIMER_WHEEL_SLOT_BITS = 6
+TIMER_WHEEL_LEVELS = 3
+
+_SLOTS = 1 << TIMER_WHEEL_SLOT_BITS
+_SLOT_MASK = _SLOTS - 1
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _ScheduledTask(object):
+    """Class used to store a task waiting in the timer wheel."""
+
+    __slots__ = ('due', 'callback', 'args', 'key', 'cancelled')
+
+    def __init__(self, due, callback, args, key):
+        """Object initialization."""
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.key = key
+        self.cancelled = False
+
+
+class _TimerWheel(object):
+    """Class used to run delayed tasks from a hierarchical timer wheel, advanced once per tick.
+
+        * scheduling and cancelling a task is O(1), and each tick only visits the tasks which are due
+        * tasks can be given a key: (entity index, kind), scheduling a task replaces the one with the same key
+        * tasks of an entity are cancelled when the entity is deleted or the player disconnects
+        * all tasks are cancelled when the map ends
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store one list of tasks per slot for each wheel
+        self._wheels = [[list() for _ in range(_SLOTS)] for _ in range(TIMER_WHEEL_LEVELS)]
+
+        # Store tasks which are due too late for the highest wheel
+        self._overflow = list()
+
+        # Store the current slot number
+        self._tick = self._get_current_tick()
+
+        # Store keyed tasks: {key: task} and the keys of each entity: {index: {key, ...}}
+        self._keyed_tasks = dict()
+        self._entity_keys = dict()
+
+        # Store the number of tasks which have neither run nor been cancelled
+        self.pending = 0
+
+    def schedule(self, delay, callback, args=(), key=None, replace=True):
+        """Run `callback(*args)` after `delay` seconds and return the task.
+
+        A task with the same key (entity index, kind) is replaced, or kept (and returned) if `replace` is False.
+        """
+        if key is not None:
+            if not replace and key in self._keyed_tasks:
+                return self._keyed_tasks[key]
+
+            self.cancel(key)
+
+        task = _ScheduledTask(self._tick + max(1, ceil(delay / TIMER_WHEEL_RESOLUTION)), callback, args, key)
+        self._insert(task)
+        self.pending += 1
+
+        if key is not None:
+            self._keyed_tasks[key] = task
+            self._entity_keys.setdefault(key[0], set()).add(key)
+
+        return task
+
+    def cancel(self, key):
+        """Cancel the task with the key and return whether there was one."""
+        task = self._keyed_tasks.pop(key, None)
+
+        if task is None:
+            return False
+
+        self._forget_key(key)
+        task.cancelled = True
+        self.pending -= 1
+
+        return True
+
+    def cancel_entity(self, index):
+        """Cancel all tasks of the entity index."""
+        for key in list(self._entity_keys.get(index, ())):
+            self.cancel(key)
+
+    def is_scheduled(self, key):
+        """Return whether a task with the key is waiting."""
+        return key in self._keyed_tasks
+
+    def get_pending_by_kind(self):
+        """Return the number of waiting keyed tasks by their kind."""
+        return Counter(kind for _, kind in self._keyed_tasks)
+
+    def clear(self):
+        """Cancel all tasks."""
+        for wheel in self._wheels:
+            for slot in wheel:
+                for task in slot:
+                    task.cancelled = True
+
+                slot.clear()
+
+        for task in self._overflow:
+            task.cancelled = True
+
+        self._overflow.clear()
+        self._keyed_tasks.clear()
+        self._entity_keys.clear()
+        self.pending = 0
+
+    def advance(self):
+        """Run all tasks which are due by the current server time."""
+        current_tick = self._get_current_tick()
+
+        # Move the wheel if the server time has jumped backwards (i.e. after a map change) or too far ahead
+        if current_tick < self._tick or current_tick - self._tick > _SLOTS ** TIMER_WHEEL_LEVELS:
+            self._rebase(current_tick)
+
+        # Skip slots at once if there is nothing to run
+        if not self.pending:
+            self._tick = max(self._tick, current_tick)
+            return
+
+        while self._tick < current_tick:
+            self._tick += 1
+            self._cascade()
+
+            # Take the due tasks out of their slot before running them, since they might schedule new tasks
+            slot = self._wheels[0][self._tick & _SLOT_MASK]
+            tasks = slot[:]
+            slot.clear()
+
+            for task in tasks:
+                self._run(task)
+
+    def _run(self, task):
+        """Run a due task, unless it has been cancelled."""
+        if task.cancelled:
+            return
+
+        task.cancelled = True
+        self.pending -= 1
+
+        if task.key is not None:
+            del self._keyed_tasks[task.key]
+            self._forget_key(task.key)
+
+        try:
+            task.callback(*task.args)
+        except Exception:
+            except_hooks.print_exception()
+
+    def _insert(self, task):
+        """Put the task into the slot of the lowest wheel which covers its due slot number."""
+        delta = task.due - self._tick
+
+        for level in range(TIMER_WHEEL_LEVELS):
+            if delta < _SLOTS ** (level + 1):
+                self._wheels[level][(task.due >> (TIMER_WHEEL_SLOT_BITS * level)) & _SLOT_MASK].append(task)
+                return
+
+        self._overflow.append(task)
+
+    def _cascade(self):
+        """Move the tasks of the higher wheels down once the lower wheels have turned around completely."""
+        tick = self._tick
+
+        # Find the wheels which have turned around, starting with the highest one
+        for level in reversed(range(1, TIMER_WHEEL_LEVELS + 1)):
+            if tick & ((1 << (TIMER_WHEEL_SLOT_BITS * level)) - 1):
+                continue
+
+            if level == TIMER_WHEEL_LEVELS:
+                tasks, self._overflow = self._overflow, list()
+            else:
+                slot = self._wheels[level][(tick >> (TIMER_WHEEL_SLOT_BITS * level)) & _SLOT_MASK]
+                tasks = slot[:]
+                slot.clear()
+
+            for task in tasks:
+                if not task.cancelled:
+                    self._insert(task)
+
+    def _rebase(self, current_tick):
+        """Move all waiting tasks to the current slot number, keeping their remaining delays."""
+        tasks = [task for wheel in self._wheels for slot in wheel for task in slot if not task.cancelled]
+        tasks.extend(task for task in self._overflow if not task.cancelled)
+
+        for wheel in self._wheels:
+            for slot in wheel:
+                slot.clear()
+
+        self._overflow.clear()
+
+        for task in tasks:
+            task.due = current_tick + max(1, task.due - self._tick)
+
+        self._tick = current_tick
+
+        for task in tasks:
+            self._insert(task)
+
+    def _forget_key(self, key):
+        """Remove the key from the keys of its entity."""
+        keys = self._entity_keys.get(key[0])
+
+        if keys is not None:
+            keys.discard(key)
+
+            if not keys:
+                del self._entity_keys[key[0]]
+
+    @staticmethod
+    def _get_current_tick():
+        """Return the slot number for the current server time."""
+        return int(global_vars.curtime / TIMER_WHEEL_RESOLUTION)
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+scheduler = _TimerWheel()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Run all due tasks."""
+    scheduler.advance()
+
+
+@OnEntityDeleted
+@hook_stats.measure
+def on_entity_deleted(base_entity):
+    """Cancel the tasks of the deleted entity."""
+    with suppress(ValueError):
+        scheduler.cancel_entity(base_entity.index)
+
+
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Cancel the tasks of the disconnecting player."""
+    scheduler.cancel_entity(index)
+
+
+@OnLevelEnd
+@hook_stats.measure
+def on_level_end():
+    """Cancel all tasks, since all entities are going to be removed."""
+    scheduler.clear()
@@ -0,0 +1,116 @@
+# ../flashfun/server_output.py
+
+"""Provides blocking of server console output this plugin causes."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   RE
+import re
+
+# Source.Python Imports
+#   Listeners
+from listeners import OnLevelInit
+#   Paths
+from paths import PLUGIN_DATA_PATH
+
+# Plugin Imports
+#   Info
+from flashfun.info import info
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Server output to block if the blocked server output file doesn't exist
+DEFAULT_BLOCKED_SERVER_OUTPUT = (
+    'bot spawned outside of a buy zone',
+    'hostage position',
+)
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _ServerOutputFilter(object):
+    """Class used to find server output which should be blocked.
+
+        * all blocked texts are compiled into one regular expression
+        * output shorter than the shortest blocked text is let through without matching
+        * the number of times each blocked text has been found is counted
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self.patterns = tuple()
+        self._regex = None
+        self._min_length = 0
+
+        # Store the number of checked lines and of lines each blocked text has been found in
+        self.lines = 0
+        self.hits = list()
+
+    def load(self):
+        """Compile the texts from the blocked server output file (one per line, # starts a comment)."""
+        path = PLUGIN_DATA_PATH.joinpath(info.name, 'blocked_server_output.txt')
+
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                patterns = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+        else:
+            patterns = list(DEFAULT_BLOCKED_SERVER_OUTPUT)
+
+        self.compile(patterns)
+
+    def compile(self, patterns):
+        """Compile the blocked texts into one matcher, keeping the hit counters of texts which are still blocked."""
+        hits = self.get_hits()
+        self.patterns = tuple(dict.fromkeys(patterns))
+        self.hits = [hits.get(pattern, 0) for pattern in self.patterns]
+
+        if not self.patterns:
+            self._regex = None
+            return
+
+        # Use one group per blocked text, so the text which has been found can be counted
+        self._regex = re.compile('|'.join(f'({re.escape(pattern)})' for pattern in self.patterns))
+        self._min_length = min(map(len, self.patterns))
+
+    def match(self, text):
+        """Return whether the server output should be blocked."""
+        self.lines += 1
+
+        if self._regex is None or len(text) < self._min_length:
+            return False
+
+        match = self._regex.search(text)
+
+        if match is None:
+            return False
+
+        self.hits[match.lastindex - 1] += 1
+        return True
+
+    def get_hits(self):
+        """Return the number of lines each blocked text has been found in: {text: hits}."""
+        return dict(zip(self.patterns, self.hits))
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+server_output_filter = _ServerOutputFilter()
+server_output_filter.load()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Reload the blocked server output file, so changes apply on map change."""
+    server_output_filter.load()
@@ -0,0 +1,189 @@
+# ../flashfun/spatial.py
+
+"""Provides spatial indexing for spawn locations and player origins."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Math
+from math import floor
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SpatialGrid(object):
+    """Class used to bucket keyed points into uniform cubic cells.
+
+        * neighbour lookups only visit the cells surrounding a point
+        * points can be moved incrementally and only change buckets when they leave their cell
+    """
+
+    def __init__(self, cell_size):
+        """Object initialization."""
+        # Store the cell size (should be at least the largest query radius)
+        self.cell_size = float(cell_size)
+
+        # Store the points of each cell: {cell: {key: (x, y, z)}}
+        self._cells = dict()
+
+        # Store the cell of each key: {key: cell}
+        self._keys = dict()
+
+    def __len__(self):
+        """Return the number of points in the grid."""
+        return len(self._keys)
+
+    def __contains__(self, key):
+        """Return whether the key is stored in the grid."""
+        return key in self._keys
+
+    def cell(self, x, y, z):
+        """Return the cell the xyz-coordinates belong to."""
+        size = self.cell_size
+        return floor(x / size), floor(y / size), floor(z / size)
+
+    def insert(self, key, x, y, z):
+        """Store the point for the key, replacing its previous location."""
+        cell = self.cell(x, y, z)
+        previous = self._keys.get(key)
+
+        # Drop the key from its old cell, if it has left it
+        if previous is not None and previous != cell:
+            self._discard_from_cell(previous, key)
+
+        self._keys[key] = cell
+        self._cells.setdefault(cell, dict())[key] = (x, y, z)
+
+    # Moving a point is the same as inserting it again
+    move = insert
+
+    def remove(self, key):
+        """Remove the point stored for the key, if any."""
+        cell = self._keys.pop(key, None)
+
+        if cell is not None:
+            self._discard_from_cell(cell, key)
+
+    def clear(self):
+        """Remove all points."""
+        self._cells.clear()
+        self._keys.clear()
+
+    def keys(self):
+        """Return a view of all keys."""
+        return self._keys.keys()
+
+    def items(self):
+        """Yield (key, (x, y, z)) for every point."""
+        for points in self._cells.values():
+            yield from points.items()
+
+    def within(self, x, y, z, radius, exclude=()):
+        """Yield (key, squared distance) for every point closer than `radius` to the xyz-coordinates.
+
+        Keys contained in `exclude` are skipped.
+        """
+        radius_squared = radius * radius
+        reach = max(1, int(-(-radius // self.cell_size)))
+        cx, cy, cz = self.cell(x, y, z)
+        cells = self._cells
+
+        for ix in range(cx - reach, cx + reach + 1):
+            for iy in range(cy - reach, cy + reach + 1):
+                for iz in range(cz - reach, cz + reach + 1):
+                    points = cells.get((ix, iy, iz))
+
+                    if not points:
+                        continue
+
+                    for key, (px, py, pz) in points.items():
+                        if key in exclude:
+                            continue
+
+                        distance_squared = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+
+                        if distance_squared < radius_squared:
+                            yield key, distance_squared
+
+    def nearest(self, x, y, z):
+        """Return (key, squared distance) of the point closest to the xyz-coordinates, or None if the grid is empty."""
+        if not self._keys:
+            return None
+
+        cx, cy, cz = self.cell(x, y, z)
+        cells = self._cells
+        best = None
+        reach = 0
+
+        while True:
+
+            # Visiting shells with more cells than there are non-empty cells is more expensive than checking every point
+            if reach and 24 * reach * reach + 2 > len(cells):
+                for key, (px, py, pz) in self.items():
+                    distance_squared = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+
+                    if best is None or distance_squared < best[1]:
+                        best = key, distance_squared
+
+                return best
+
+            # Visit the cells of the shell `reach` cells away from the point's cell
+            for cell in self._get_shell(cx, cy, cz, reach):
+                points = cells.get(cell)
+
+                if not points:
+                    continue
+
+                for key, (px, py, pz) in points.items():
+                    distance_squared = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+
+                    if best is None or distance_squared < best[1]:
+                        best = key, distance_squared
+
+            # Points in cells farther away are at least `reach` cells away
+            if best is not None and best[1] <= (reach * self.cell_size) ** 2:
+                return best
+
+            reach += 1
+
+    def any_within(self, x, y, z, radius, exclude=()):
+        """Return whether any point is closer than `radius` to the xyz-coordinates."""
+        for _ in self.within(x, y, z, radius, exclude):
+            return True
+
+        return False
+
+    @staticmethod
+    def _get_shell(cx, cy, cz, reach):
+        """Yield the cells exactly `reach` cells away from the cell, visiting only the faces of the cube."""
+        if not reach:
+            yield cx, cy, cz
+            return
+
+        inner = range(-reach + 1, reach)
+        full = range(-reach, reach + 1)
+
+        # The two faces along the x-axis, then the y-axis faces and z-axis faces without the cells already visited
+        for dx in (-reach, reach):
+            for dy in full:
+                for dz in full:
+                    yield cx + dx, cy + dy, cz + dz
+
+        for dx in inner:
+            for dy in (-reach, reach):
+                for dz in full:
+                    yield cx + dx, cy + dy, cz + dz
+
+            for dy in inner:
+                for dz in (-reach, reach):
+                    yield cx + dx, cy + dy, cz + dz
+
+    def _discard_from_cell(self, cell, key):
+        """Remove the key from the cell and drop the cell if it is empty."""
+        points = self._cells[cell]
+        del points[key]
+
+        if not points:
+            del self._cells[cell]
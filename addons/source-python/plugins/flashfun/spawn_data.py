@@ -0,0 +1,488 @@
+# ../flashfun/spawn_data.py
+
+"""Provides compact storage for spawn location data."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Array
+from array import array
+#   Contextlib
+from contextlib import suppress
+#   Hashlib
+from hashlib import sha1
+#   JSON
+import json
+#   Mmap
+import mmap
+#   OS
+import os
+#   Struct
+from struct import Struct
+#   Sys
+import sys
+#   Threading
+from threading import get_ident
+from threading import Lock
+
+# Site-Packages Imports
+#   NumPy
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Safe distance between spawn locations (in units)
+SAFE_SPAWN_DISTANCE = 150.0
+
+# Binary spawn locations file identification
+BINARY_MAGIC = b'FFSL'
+BINARY_VERSION = 1
+
+# Binary spawn locations file header: magic, version, reserved, spawn location count, SHA-1 hash of the JSON file
+_BINARY_HEADER = Struct('<4sHHI20s')
+
+# Spawn location distance matrix file identification (the header is the same as for binary spawn locations files)
+DISTANCE_MATRIX_MAGIC = b'FFSD'
+DISTANCE_MATRIX_VERSION = 1
+
+# Size of one float in binary files (32-bit)
+_FLOAT_SIZE = 4
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def file_hash(path):
+    """Return the SHA-1 hash of a file's contents."""
+    with open(path, 'rb') as f:
+        return sha1(f.read()).digest()
+
+
+def _read_blocks(path, magic, version, source_hash, get_block_sizes):
+    """Return the float array blocks, the count and the source hash of a binary file, or None if it is invalid.
+
+    `get_block_sizes` returns the number of floats in each block for the count stored in the header.
+    """
+    blocks = list()
+
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) < _BINARY_HEADER.size:
+                return None
+
+            file_magic, file_version, _, count, file_source_hash = _BINARY_HEADER.unpack_from(mapped)
+
+            if file_magic != magic or file_version != version:
+                return None
+
+            if source_hash is not None and source_hash != file_source_hash:
+                return None
+
+            sizes = [size * _FLOAT_SIZE for size in get_block_sizes(count)]
+            start = _BINARY_HEADER.size
+
+            if len(mapped) != start + sum(sizes):
+                return None
+
+            # Copy each block straight from the mapped file
+            with memoryview(mapped) as view:
+                for size in sizes:
+                    block = array('f')
+
+                    with view[start:start + size] as chunk:
+                        block.frombytes(chunk)
+
+                    blocks.append(block)
+                    start += size
+
+    except (OSError, ValueError):
+        return None
+
+    # The file is always little-endian
+    if sys.byteorder != 'little':
+        for block in blocks:
+            block.byteswap()
+
+    return blocks, count, file_source_hash
+
+
+def _write_blocks(path, magic, version, count, source_hash, blocks):
+    """Write float array blocks to a binary file."""
+    # The file is always little-endian
+    if sys.byteorder != 'little':
+        blocks = [array('f', block) for block in blocks]
+
+        for block in blocks:
+            block.byteswap()
+
+    # Write to a temporary file first, so a binary file is never read half-written (or written by two threads at once)
+    temporary_path = f'{path}.{get_ident()}.tmp'
+
+    with open(temporary_path, 'wb') as f:
+        f.write(_BINARY_HEADER.pack(magic, version, 0, count, source_hash))
+
+        for block in blocks:
+            block.tofile(f)
+
+    os.replace(temporary_path, path)
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class SpawnLocationStore(object):
+    """Class used to store spawn locations as contiguous float arrays.
+
+        * origins are stored as x, y, z triples
+        * angles are stored as pitch, yaw, roll triples
+        * every change increases `version`, so derived data can be cached against it
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self._origins = array('f')
+        self._angles = array('f')
+        self.version = 0
+
+        # Store the SHA-1 hash of the JSON file the spawn locations have been read from, if they are unchanged since
+        self.source_hash = None
+
+    def __len__(self):
+        """Return the number of spawn locations."""
+        return len(self._origins) // 3
+
+    def origin(self, index):
+        """Return the xyz-coordinates of the spawn location at `index`."""
+        start = self._check_index(index) * 3
+        return tuple(self._origins[start:start + 3])
+
+    def angle(self, index):
+        """Return the angle of the spawn location at `index`."""
+        start = self._check_index(index) * 3
+        return tuple(self._angles[start:start + 3])
+
+    def add(self, origin, angle):
+        """Add a spawn location from xyz-coordinates and an angle."""
+        self.insert(len(self), origin, angle)
+
+    def insert(self, index, origin, angle):
+        """Insert a spawn location from xyz-coordinates and an angle before `index`."""
+        start = min(max(index, 0), len(self)) * 3
+        self._origins[start:start] = array('f', origin)
+        self._angles[start:start] = array('f', angle)
+        self.version += 1
+        self.source_hash = None
+
+    def pop(self, index):
+        """Remove the spawn location at `index` and return its origin and angle."""
+        origin, angle = self.origin(index), self.angle(index)
+
+        start = self._check_index(index) * 3
+        del self._origins[start:start + 3]
+        del self._angles[start:start + 3]
+        self.version += 1
+        self.source_hash = None
+
+        return origin, angle
+
+    def copy(self):
+        """Return a copy of the spawn locations with the same version."""
+        store = type(self)()
+        store._origins.extend(self._origins)
+        store._angles.extend(self._angles)
+        store.version = self.version
+        store.source_hash = self.source_hash
+
+        return store
+
+    def clear(self):
+        """Remove all spawn locations."""
+        del self._origins[:]
+        del self._angles[:]
+        self.version += 1
+        self.source_hash = None
+
+    def read_json(self, path):
+        """Add all spawn locations stored in a JSON file and return the SHA-1 hash of its contents."""
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        for entry in json.loads(data.decode('utf-8')):
+            self._origins.extend(entry['vector'])
+            self._angles.extend(entry['angle'])
+
+        self.version += 1
+        self.source_hash = sha1(data).digest()
+
+        return self.source_hash
+
+    def write_json(self, path):
+        """Write all spawn locations to a JSON file and return the SHA-1 hash of its contents."""
+        data = json.dumps(self.json, indent=4).encode('utf-8')
+
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        self.source_hash = sha1(data).digest()
+
+        return self.source_hash
+
+    def read_binary(self, path, source_hash=None):
+        """Add all spawn locations stored in a binary file and return whether it was valid.
+
+        If `source_hash` is given, the file is only valid if it has been generated from a JSON file with that hash.
+        """
+        blocks = _read_blocks(path, BINARY_MAGIC, BINARY_VERSION, source_hash, lambda count: (count * 3, count * 3))
+
+        if blocks is None:
+            return False
+
+        (origins, angles), _, file_source_hash = blocks
+
+        self._origins.extend(origins)
+        self._angles.extend(angles)
+        self.version += 1
+        self.source_hash = file_source_hash
+
+        return True
+
+    def write_binary(self, path, source_hash):
+        """Write all spawn locations to a binary file generated from a JSON file with the SHA-1 hash `source_hash`."""
+        _write_blocks(path, BINARY_MAGIC, BINARY_VERSION, len(self), source_hash, (self._origins, self._angles))
+
+    @property
+    def json(self):
+        """Return a JSON representation of all spawn locations."""
+        origins, angles = self._origins, self._angles
+
+        return [
+            {
+                'vector': origins[start:start + 3].tolist(),
+                'angle': angles[start:start + 3].tolist()
+            } for start in range(0, len(origins), 3)
+        ]
+
+    def _check_index(self, index):
+        """Return `index` as a positive index, raise IndexError if it is out of range."""
+        length = len(self)
+
+        if index < 0:
+            index += length
+
+        if not 0 <= index < length:
+            raise IndexError('spawn location index out of range')
+
+        return index
+
+
+class SpawnDistanceMatrix(object):
+    """Class used to store the distances between all pairs of spawn locations.
+
+        * stored as a flat, symmetric count x count float array, so each row is also a column
+        * never changed after creation
+    """
+
+    def __init__(self, count, distances):
+        """Object initialization."""
+        self.count = count
+        self._distances = distances
+
+    @classmethod
+    def from_store(cls, store):
+        """Return a new matrix for all spawn locations of the store, calculated with NumPy if it is available."""
+        count = len(store)
+
+        if numpy is not None:
+            origins = numpy.frombuffer(store._origins, dtype=numpy.float32).astype(float).reshape(-1, 3)
+
+            # Use |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, which needs no count x count x 3 array
+            squares = numpy.einsum('ij,ij->i', origins, origins)
+            distances_squared = squares[:, None] + squares[None, :] - 2.0 * (origins @ origins.T)
+            numpy.fill_diagonal(distances_squared, 0.0)
+
+            distances = array('f')
+            distances.frombytes(numpy.sqrt(numpy.maximum(distances_squared, 0.0)).astype(numpy.float32).tobytes())
+
+            return cls(count, distances)
+
+        distances = array('f', bytes(count * count * _FLOAT_SIZE))
+        origins = [store.origin(index) for index in range(count)]
+
+        for a, (xa, ya, za) in enumerate(origins):
+            for b in range(a + 1, count):
+                xb, yb, zb = origins[b]
+                distances[a * count + b] = distances[b * count + a] = (
+                    (xa - xb) ** 2 + (ya - yb) ** 2 + (za - zb) ** 2
+                ) ** 0.5
+
+        return cls(count, distances)
+
+    @classmethod
+    def read(cls, path, source_hash):
+        """Return the matrix stored in a file generated for a JSON file with the hash `source_hash`, or None."""
+        blocks = _read_blocks(
+            path, DISTANCE_MATRIX_MAGIC, DISTANCE_MATRIX_VERSION, source_hash, lambda count: (count * count, )
+        )
+
+        if blocks is None:
+            return None
+
+        (distances, ), count, _ = blocks
+
+        return cls(count, distances)
+
+    def write(self, path, source_hash):
+        """Write the matrix to a file generated for a JSON file with the hash `source_hash`."""
+        _write_blocks(
+            path, DISTANCE_MATRIX_MAGIC, DISTANCE_MATRIX_VERSION, self.count, source_hash, (self._distances, )
+        )
+
+    def row(self, index):
+        """Return the distances between the spawn location at `index` and all spawn locations."""
+        start = index * self.count
+        return self._distances[start:start + self.count]
+
+    @property
+    def distances(self):
+        """Return the flat distances array (do not change it)."""
+        return self._distances
+
+
+class SpawnLocationJournal(object):
+    """Class used to record spawn location changes in an append-only file.
+
+        * the first line is a JSON header with the SHA-1 hash of the JSON file the changes are for: {"source_hash": ...}
+        * each following line is a JSON record: {"op": "add" or "remove", "index": ..., "vector": [...], "angle": [...]}
+        * the last record can be undone, which truncates the file
+        * safe to use from any thread
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self._lock = Lock()
+        self._path = None
+
+        # Store the header of the journal file
+        self._header = None
+
+        # Store (file offset, record) for each record
+        self._records = list()
+
+    def __len__(self):
+        """Return the number of records."""
+        return len(self._records)
+
+    def open(self, path, source_hash):
+        """Use the journal file at `path` and return its records.
+
+        The journal file is discarded if it has been recorded for another JSON file than the one with the SHA-1 hash
+        `source_hash` (None if there is no JSON file).
+        """
+        with self._lock:
+            self._path = path
+            self._header = self._get_header(source_hash)
+            self._records.clear()
+
+            if not os.path.exists(path):
+                return list()
+
+            with open(path, 'rb') as f:
+                header = f.readline()
+                offset = len(header)
+
+                for line in f if header == self._header else ():
+
+                    # Stop at the first broken record, it has never been written completely
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        break
+
+                    self._records.append((offset, record))
+                    offset += len(line)
+
+            # Discard changes recorded for another JSON file, e.g. if the server stopped while writing them to it
+            if header != self._header:
+                os.remove(path)
+                return list()
+
+            # Drop anything following the last complete record
+            if offset != os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+
+            return [record for _, record in self._records]
+
+    def append(self, op, index, origin, angle):
+        """Record a change."""
+        record = {'op': op, 'index': index, 'vector': list(origin), 'angle': list(angle)}
+        data = (json.dumps(record) + '\n').encode('utf-8')
+
+        with self._lock:
+            with open(self._path, 'ab') as f:
+                offset = f.tell()
+
+                # Start a new journal file with the header
+                if not offset:
+                    f.write(self._header)
+                    offset = len(self._header)
+
+                f.write(data)
+
+            self._records.append((offset, record))
+
+    def pop(self):
+        """Remove and return the last record, or None if there is none."""
+        with self._lock:
+            if not self._records:
+                return None
+
+            offset, record = self._records.pop()
+
+            with open(self._path, 'r+b') as f:
+                f.truncate(offset)
+
+            return record
+
+    def discard(self, count, source_hash):
+        """Remove the first `count` records, once they have been written to a JSON file.
+
+        The remaining records apply to that JSON file (with the SHA-1 hash `source_hash`) from now on.
+        """
+        with self._lock:
+            records = [record for _, record in self._records[count:]]
+            self._records.clear()
+            self._header = self._get_header(source_hash)
+
+            if not records:
+                with suppress(FileNotFoundError):
+                    os.remove(self._path)
+
+                return
+
+            # Rewrite the remaining records
+            temporary_path = f'{self._path}.tmp'
+            offset = len(self._header)
+
+            with open(temporary_path, 'wb') as f:
+                f.write(self._header)
+
+                for record in records:
+                    data = (json.dumps(record) + '\n').encode('utf-8')
+                    f.write(data)
+                    self._records.append((offset, record))
+                    offset += len(data)
+
+            os.replace(temporary_path, self._path)
+
+    @staticmethod
+    def _get_header(source_hash):
+        """Return the header line of a journal file for the JSON file with the SHA-1 hash `source_hash`."""
+        header = {'source_hash': None if source_hash is None else source_hash.hex()}
+        return (json.dumps(header) + '\n').encode('utf-8')
@@ -6,10 +6,34 @@
 # >> IMPORTS
 # =============================================================================
 # Python Imports
-#   JSON
-import json
+#   Collections
+from collections import deque
+#   Contextlib
+from contextlib import suppress
+#   Itertools
+from itertools import repeat
+#   Math
+from math import inf
+#   Operator
+from operator import itemgetter
+from operator import sub
+#   OS
+import os
+#   Queue
+from queue import Queue
 #   Random
 import random
+#   Threading
+from threading import Lock
+#   Time
+from time import perf_counter
+
+# Site-Packages Imports
+#   NumPy
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Source.Python Imports
 #   Core
@@ -18,8 +42,12 @@ from core import GAME_NAME
 from engines.server import global_vars
 #   Filters
 from filters.players import PlayerIter
+#   Hooks
+from hooks.exceptions import except_hooks
 #   Listeners
 from listeners import OnLevelInit
+from listeners import OnTick
+from listeners.tick import GameThread
 #   Mathlib
 from mathlib import QAngle
 from mathlib import Vector
@@ -27,15 +55,37 @@ from mathlib import Vector
 from paths import PLUGIN_DATA_PATH
 
 # Script Imports
+#   Config
+from flashfun.config import cvar_spawn_location_backend
+from flashfun.config import cvar_spawn_location_mode
+from flashfun.config import cvar_spawn_location_randomness
 #   Info
 from flashfun.info import info
+#   Player Cache
+from flashfun.player_cache import player_cache
+#   Spatial
+from flashfun.spatial import SpatialGrid
+#   Spawn Data
+from flashfun.spawn_data import file_hash
+from flashfun.spawn_data import SAFE_SPAWN_DISTANCE
+from flashfun.spawn_data import SpawnDistanceMatrix
+from flashfun.spawn_data import SpawnLocationJournal
+from flashfun.spawn_data import SpawnLocationStore
+#   Stats
+from flashfun.stats import hook_stats
 
 
 # =============================================================================
 # >> CONSTANTS
 # =============================================================================
-# Safe distance between spawn locations (in units)
-SAFE_SPAWN_DISTANCE = 150.0
+# Number of random spawn locations to try before scanning all of them
+RANDOM_SPAWN_LOCATION_ATTEMPTS = 8
+
+# Number of random spawn locations scored for each job in the scored mode, unless NumPy is used (0 = all)
+SCORED_SPAWN_LOCATION_SAMPLE = 64
+
+# Time a spawn location is kept from being handed out again after it has been assigned (in seconds)
+SPAWN_LOCATION_RESERVATION_TIME = 1.0
 
 
 # =============================================================================
@@ -53,116 +103,992 @@ if not _spawn_locations_path.exists():
 # =============================================================================
 # >> CLASSES
 # =============================================================================
-class SpawnLocation(Vector):
-    """Class used to attach a QAngle to a Vector and provide a JSON representation for the respective locations."""
+class SpawnLocation(object):
+    """Class used to provide a lightweight view of a spawn location's origin and angle."""
+
+    __slots__ = ('x', 'y', 'z', '_angle')
 
     def __init__(self, x, y, z, angle):
         """Object initialization."""
-        # Call Vector's constructor using the given xyz-coordinates
-        super().__init__(x, y, z)
+        # Store the xyz-coordinates
+        self.x = x
+        self.y = y
+        self.z = z
 
-        # Store the QAngle object
-        self._angle = angle
+        # Store the angle as a (pitch, yaw, roll) tuple
+        self._angle = tuple(angle)
 
     @classmethod
     def from_player_location(cls, player):
         """Return a `SpawnLocation` (subclass) object from a player's location."""
-        return cls(player.origin.x, player.origin.y, player.origin.z, player.view_angle)
+        origin, angle = player.origin, player.view_angle
+        return cls(origin.x, origin.y, origin.z, (angle.x, angle.y, angle.z))
 
     @staticmethod
     def find_spawn_location(player):
         """Return a unique spawn location for the player."""
-        # Get a list of current player origins
-        other_origins = [other.origin for other in PlayerIter(is_filters='alive') if player.userid != other.userid]
-
-        shuffled_spawn_locations = spawn_locations_manager.copy()
-        random.shuffle(shuffled_spawn_locations)
+        return SpawnLocation.find_spawn_locations([player])[0]
 
-        # Loop through the shuffled list of spawn locations
-        for spawn_location in shuffled_spawn_locations:
-
-            # Calculate the distances between the spawn location and all player origins
-            distances = [origin.get_distance(spawn_location) for origin in other_origins]
-
-            # Return the spawn location found, if it is far enough away from the player
-            if distances and min(distances) >= SAFE_SPAWN_DISTANCE:
-                return spawn_location
-
-        # Return the player's current location as a spawn location if no other one has been found
-        return SpawnLocation.from_player_location(player)
+    @staticmethod
+    def find_spawn_locations(players):
+        """Return a unique spawn location for each of the players, keeping them away from each other as well."""
+        return spawn_location_finder.assign(_SpawnLocationJob(players))
 
     def move_player(self, player):
         """Move the player to this spawn location location."""
-        player.origin = self
+        player.origin = self.origin
         player.view_angle = self.angle
 
+    @property
+    def origin(self):
+        """Return a new Vector object for the xyz-coordinates."""
+        return Vector(self.x, self.y, self.z)
+
     @property
     def angle(self):
-        """Return the QAngle object."""
-        return self._angle
+        """Return a new QAngle object for the angle."""
+        return QAngle(*self._angle)
 
     @property
     def json(self):
         """Return a JSON representation of the spawn location."""
         return {
             'vector': [self.x, self.y, self.z],
-            'angle': [self.angle.x, self.angle.y, self.angle.z]
+            'angle': list(self._angle)
         }
 
 
-class SpawnLocationDispatcher(object):
-    """Class used to move a player to a spawn location location from another thread."""
+class _SpawnLocationJob(object):
+    """Class used to capture everything needed to assign spawn locations, so it can be done off the main thread.
+
+        * must be created on the main thread
+        * never changes after creation
+    """
+
+    __slots__ = (
+        'userids', 'teams', 'fallbacks', 'spawn_locations', 'player_userids', 'player_origins', 'player_teams',
+        'curtime', 'vectorized', 'scored', 'randomness', 'level', 'submitted'
+    )
+
+    def __init__(self, players):
+        """Object initialization."""
+        # Store the players to assign spawn locations to and their current locations as fallbacks
+        self.userids = tuple(player.userid for player in players)
+        self.teams = tuple(player.team for player in players)
+        self.fallbacks = tuple(SpawnLocation.from_player_location(player) for player in players)
+
+        # Store snapshots of the spawn locations and alive players
+        self.spawn_locations = spawn_locations_manager.snapshot()
+        self.player_userids, self.player_origins, self.player_teams = player_origin_snapshot.get()
+
+        # Store the server time and the search settings
+        self.curtime = global_vars.curtime
+        self.vectorized = numpy is not None and str(cvar_spawn_location_backend) == 'numpy'
+        self.scored = str(cvar_spawn_location_mode) == 'scored'
+        self.randomness = min(max(float(cvar_spawn_location_randomness), 0.0), 1.0)
+
+        # Calculate the distances between all spawn locations, if the scored mode has just been turned on or the spawn
+        #   locations have changed (random spawn locations are used until then)
+        if self.scored:
+            spawn_locations_manager.prepare_distance_matrix()
+
+        # Store the level the job has been created on and when
+        self.level = spawn_location_dispatcher.level
+        self.submitted = perf_counter()
+
+
+class _SpawnLocationFinder(object):
+    """Class used to assign spawn locations to jobs.
+
+        * keeps its own index of player origins and spawn location reservations
+        * reservations are dropped when the spawn locations change, since they are keyed by spawn location index
+        * safe to use from any thread
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self._lock = Lock()
+        self._player_origin_index = _PlayerOriginIndex()
+        self._reservations = _SpawnLocationReservations()
+
+        # Store the version of the spawn locations the reservations have been made for
+        self._reservations_version = None
+
+        # Store the spawn locations close to each cell of the spawn locations grid, for the spawn locations snapshot
+        self._snap_spawn_locations = None
+        self._snap_cells = dict()
+
+    def assign(self, job):
+        """Return a unique spawn location for each player of the job."""
+        with self._lock:
+
+            # Make sure the index of player origins and the spawn location reservations are up to date
+            self._player_origin_index.update(job.player_userids, job.player_origins)
+
+            if self._reservations_version != job.spawn_locations.version:
+                self._reservations_version = job.spawn_locations.version
+                self._reservations.reset()
+            else:
+                self._reservations.purge(job.curtime)
+
+            # Assign spawn locations using the job's mode and backend
+            if job.scored and job.spawn_locations.distance_matrix is not None:
+                indexes = self._assign_scored(job)
+            elif job.vectorized:
+                indexes = self._assign_vectorized(job)
+            else:
+                indexes = self._assign_with_grid(job)
+
+        # Use the player's current location as a spawn location if no other one has been found
+        return [
+            fallback if index is None else job.spawn_locations[index]
+            for fallback, index in zip(job.fallbacks, indexes)
+        ]
+
+    def reset(self):
+        """Remove all player origins and reservations."""
+        with self._lock:
+            self._player_origin_index.clear()
+            self._reservations.reset()
+            self._reservations_version = None
+            self._snap_spawn_locations = None
+            self._snap_cells.clear()
+
+    def _assign_with_grid(self, job):
+        """Return a spawn location index (or None) for each player using neighbour-cell lookups."""
+        # Ignore the current origins of all players in this job, since they are all about to be moved
+        batch = set(job.userids)
+        indexes = list()
+
+        for userid in job.userids:
+
+            # Keep the player's current location if no other player is alive
+            if not self._player_origin_index.has_others(userid):
+                indexes.append(None)
+                continue
+
+            # Use a random safe spawn location, or the one farthest away from everyone else if none is safe
+            index = self._find_with_grid(job, batch)
+
+            if index is None:
+                index = self._find_farthest(job, batch)
+
+            # Keep the spawn location from being handed out again for now
+            if index is not None:
+                self._reservations.reserve(index, job.spawn_locations.origin(index), job.curtime)
+
+            indexes.append(index)
+
+        return indexes
+
+    def _find_with_grid(self, job, batch):
+        """Return the index of a random safe spawn location, or None."""
+        spawn_locations = job.spawn_locations
+        count = len(spawn_locations)
+
+        # Try a few random spawn locations first, this is usually enough
+        for _ in range(min(RANDOM_SPAWN_LOCATION_ATTEMPTS, count)):
+            index = random.randrange(count)
+
+            if self._is_safe(spawn_locations.origin(index), batch):
+                return index
+
+        shuffled_indexes = list(range(count))
+        random.shuffle(shuffled_indexes)
+
+        # Loop through the shuffled spawn location indexes
+        for index in shuffled_indexes:
+
+            # Return the spawn location found, if it is far enough away from all other players
+            if self._is_safe(spawn_locations.origin(index), batch):
+                return index
+
+        return None
+
+    def _find_farthest(self, job, batch):
+        """Return the index of the spawn location farthest away from all other players and reservations, or None."""
+        spawn_locations = job.spawn_locations
+        obstacles = self._get_obstacles(job, batch)
+
+        if not obstacles or not spawn_locations:
+            return None
+
+        def closest(index):
+            x, y, z = spawn_locations.origin(index)
+            return min((ox - x) ** 2 + (oy - y) ** 2 + (oz - z) ** 2 for ox, oy, oz in obstacles)
+
+        return max(range(len(spawn_locations)), key=closest)
+
+    def _assign_vectorized(self, job):
+        """Return a spawn location index (or None) for each player scoring all spawn locations at once.
+
+        This measures the distances between all spawn locations and all other players for each job, so it is slower
+        than the neighbour-cell lookups of the grid backend. It is kept to compare the results of both backends.
+        """
+        if not job.spawn_locations:
+            return [None] * len(job.userids)
+
+        spawn_origins = job.spawn_locations.origins
+
+        # Get the squared distance between each spawn location and the closest player or reservation
+        closest = numpy.full(len(spawn_origins), numpy.inf)
+        obstacles = self._get_obstacles(job, set(job.userids))
+
+        if obstacles:
+            deltas = spawn_origins[:, None, :] - numpy.array(obstacles, dtype=float)[None, :, :]
+            closest = numpy.einsum('ijk,ijk->ij', deltas, deltas).min(axis=1)
+
+        indexes = list()
+
+        for userid in job.userids:
+
+            # Keep the player's current location if no other player is alive
+            if not self._player_origin_index.has_others(userid):
+                indexes.append(None)
+                continue
+
+            # Use a random safe spawn location, or the one farthest away from everyone else if none is safe
+            safe = numpy.flatnonzero(closest >= SAFE_SPAWN_DISTANCE ** 2)
+            index = int(random.choice(safe)) if safe.size else int(closest.argmax())
+
+            # Keep the spawn location from being handed out again for now
+            self._reservations.reserve(index, job.spawn_locations.origin(index), job.curtime)
+            indexes.append(index)
+
+            # Account for the spawn location handed out for the rest of the job
+            deltas = spawn_origins - spawn_origins[index]
+            closest = numpy.minimum(closest, numpy.einsum('ij,ij->i', deltas, deltas))
+
+        return indexes
+
+    def _assign_scored(self, job):
+        """Return a spawn location index (or None) for each player, preferring safe spawn locations far from enemies.
+
+        Distances are looked up in the spawn location distance matrix: every other player is snapped to a spawn
+        location close to them, which gives a lower bound for their distance to each spawn location. The bounds are
+        calculated once per job and only tightened by the spawn locations handed out meanwhile. Without NumPy, only a
+        random sample of the spawn locations is scored on large maps.
+        """
+        spawn_locations = job.spawn_locations
+        matrix = spawn_locations.distance_matrix
+        count = len(spawn_locations)
+
+        if not count:
+            return [None] * len(job.userids)
+
+        # Get the spawn locations to score
+        if job.vectorized or not 0 < SCORED_SPAWN_LOCATION_SAMPLE < count:
+            columns = None
+        else:
+            columns = random.sample(range(count), SCORED_SPAWN_LOCATION_SAMPLE)
+
+        # Snap all players outside the batch to spawn locations, keeping the closest player per spawn location and team
+        batch = set(job.userids)
+        obstacles = dict()
+
+        for userid, origin, team in zip(job.player_userids, job.player_origins, job.player_teams):
+            if userid in batch:
+                continue
+
+            index, radius = self._snap(spawn_locations, origin)
+            team_obstacles = obstacles.setdefault(team, dict())
+
+            if radius < team_obstacles.get(index, inf):
+                team_obstacles[index] = radius
+
+        # Get the distance bounds to each team, and to the reservations (which are spawn locations themselves)
+        team_bounds = {
+            team: self._get_lower_bounds(job, matrix, columns, team_obstacles.items())
+            for team, team_obstacles in obstacles.items()
+        }
+        reserved = self._get_lower_bounds(
+            job, matrix, columns, [(index, 0.0) for index in self._reservations.keys() if index < count]
+        )
+        closest = self._get_minimum(job, reserved, *team_bounds.values())
+
+        # Store the distance bounds to the enemies of each team in the batch, calculated on demand
+        enemy_bounds = dict()
+        indexes = list()
+
+        for userid, team in zip(job.userids, job.teams):
+
+            # Keep the player's current location if no other player is alive
+            if not self._player_origin_index.has_others(userid):
+                indexes.append(None)
+                continue
+
+            closest_enemy = enemy_bounds.get(team)
+
+            if closest_enemy is None:
+                closest_enemy = enemy_bounds[team] = self._get_minimum(
+                    job, reserved, *(bounds for other, bounds in team_bounds.items() if other != team)
+                )
+
+            # Choose among the safe spawn locations scored
+            position = self._choose_scored(job, closest, closest_enemy)
+            index = None
+
+            # Use any safe spawn location if none of the sample is safe
+            if position is None and columns is not None:
+                index = self._find_with_grid(job, batch)
+
+            # Use the one farthest away from everyone else if none is safe
+            if position is None and index is None:
+                position = (
+                    int(closest.argmax()) if job.vectorized else max(range(len(closest)), key=closest.__getitem__)
+                )
+
+            if index is None:
+                index = position if columns is None else columns[position]
+
+            # Keep the spawn location from being handed out again for now
+            self._reservations.reserve(index, spawn_locations.origin(index), job.curtime)
+            indexes.append(index)
+
+            # Account for the spawn location handed out for the rest of the job
+            row = self._get_lower_bounds(job, matrix, columns, ((index, 0.0), ))
+            reserved = self._get_minimum(job, reserved, row)
+            closest = self._get_minimum(job, closest, row)
+
+            for other, bounds in enemy_bounds.items():
+                enemy_bounds[other] = self._get_minimum(job, bounds, row)
+
+        return indexes
+
+    def _snap(self, spawn_locations, origin):
+        """Return the index of a spawn location close to the xyz-coordinates and the distance to it.
+
+        The spawn locations close to each cell of the spawn locations grid are cached until the spawn locations change.
+        """
+        if self._snap_spawn_locations is not spawn_locations:
+            self._snap_spawn_locations = spawn_locations
+            self._snap_cells.clear()
+
+        grid = spawn_locations.grid
+        cell = grid.cell(*origin)
+        points = self._snap_cells.get(cell)
+
+        # Get the spawn locations close to the cell's center, or the closest one if there are none
+        if points is None:
+            size = grid.cell_size
+            center = tuple((coordinate + 0.5) * size for coordinate in cell)
+            indexes = [index for index, _ in grid.within(*center, size)] or [grid.nearest(*center)[0]]
+            points = self._snap_cells[cell] = [(index, *spawn_locations.origin(index)) for index in indexes]
+
+        x, y, z = origin
+        best = None
+
+        for index, ox, oy, oz in points:
+            distance_squared = (ox - x) ** 2 + (oy - y) ** 2 + (oz - z) ** 2
+
+            if best is None or distance_squared < best[1]:
+                best = index, distance_squared
+
+        return best[0], best[1] ** 0.5
+
+    @staticmethod
+    def _choose_scored(job, closest, closest_enemy):
+        """Return the position of a random safe spawn location scoring within the randomness factor of the best one.
+
+        Positions index the distance bounds, None is returned if no spawn location is safe.
+        """
+        if job.vectorized:
+            candidates = numpy.flatnonzero(closest >= SAFE_SPAWN_DISTANCE)
+
+            if not candidates.size:
+                return None
+
+            scores = closest_enemy[candidates]
+            best = float(scores.max())
+
+            if best != inf:
+                candidates = candidates[scores >= best - abs(best) * job.randomness]
+
+            return int(random.choice(candidates))
+
+        candidates = [index for index, distance in enumerate(closest) if distance >= SAFE_SPAWN_DISTANCE]
+
+        if not candidates:
+            return None
+
+        best = max(closest_enemy[index] for index in candidates)
+
+        if best != inf:
+            threshold = best - abs(best) * job.randomness
+            candidates = [index for index in candidates if closest_enemy[index] >= threshold]
+
+        return random.choice(candidates)
 
     @staticmethod
-    def perform_action(player):
-        """Move the player to a spawn location location."""
-        # Choose a random spawn location
-        spawn_location = SpawnLocation.find_spawn_location(player)
+    def _get_lower_bounds(job, matrix, columns, obstacles):
+        """Return a lower bound of the distance between each spawn location and the closest of the obstacles.
+
+        Each obstacle is a (spawn location index, distance to that spawn location) tuple. If `columns` is given, only
+        the bounds of the spawn locations at those indexes are returned, in the same order.
+        """
+        obstacles = list(obstacles)
+        size = matrix.count if columns is None else len(columns)
+
+        if job.vectorized:
+            if not obstacles:
+                return numpy.full(size, inf, dtype=numpy.float32)
+
+            distances = numpy.frombuffer(matrix.distances, dtype=numpy.float32).reshape(matrix.count, matrix.count)
+            indexes, radii = zip(*obstacles)
+            bounds = distances[list(indexes)] - numpy.array(radii, dtype=numpy.float32)[:, None]
+
+            return bounds.min(axis=0) if columns is None else bounds.min(axis=0)[columns]
+
+        if not obstacles:
+            return [inf] * size
+
+        get_columns = (lambda row: row) if columns is None else itemgetter(*columns)
+        rows = [
+            get_columns(matrix.row(index)) if not radius else map(sub, get_columns(matrix.row(index)), repeat(radius))
+            for index, radius in obstacles
+        ]
+
+        if len(rows) == 1:
+            return list(rows[0])
+
+        return list(map(min, *rows))
+
+    @staticmethod
+    def _get_minimum(job, *bounds):
+        """Return the element-wise minimum of the distance bounds."""
+        if job.vectorized:
+            return numpy.minimum.reduce(bounds)
+
+        if len(bounds) == 1:
+            return bounds[0]
+
+        return list(map(min, *bounds))
+
+    def _is_safe(self, origin, batch):
+        """Return whether no player outside the batch and no reservation is too close to the xyz-coordinates."""
+        return not (
+            self._player_origin_index.any_within(*origin, SAFE_SPAWN_DISTANCE, batch) or
+            self._reservations.any_within(*origin, SAFE_SPAWN_DISTANCE)
+        )
+
+    def _get_obstacles(self, job, batch):
+        """Return the origins of all players outside the batch and all reservations."""
+        obstacles = [
+            origin for userid, origin in zip(job.player_userids, job.player_origins) if userid not in batch
+        ]
+        obstacles.extend(origin for _, origin in self._reservations.items())
+
+        return obstacles
+
+
+class _SpawnLocationDispatcher(object):
+    """Class used to move players to spawn locations assigned on a long-lived worker thread.
+
+        * players spawning in the same tick are assigned spawn locations together
+        * the players are moved on the main thread, when the tick listener drains the results
+        * the time taken to assign spawn locations is measured on the worker thread, but counted on the main thread
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store the players waiting for a spawn location
+        self._requests = dict()
+
+        # Store the jobs waiting for the worker thread and the results waiting for the main thread
+        self._jobs = Queue()
+        self._results = deque()
+        self._thread = None
+
+        # Store the level counter, so results from previous levels can be dropped
+        self.level = 0
+
+        # Store queue depth and latency statistics
+        self.pending = 0
+        self.applied = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self.latency_total = 0.0
+
+    def request(self, player):
+        """Move the player to a spawn location soon."""
+        self._requests[player.userid] = player
 
-        # Move the player to the spawn location found
-        spawn_location.move_player(player)
+    def dispatch(self):
+        """Submit a job for all players who requested a spawn location and apply all finished jobs."""
+        if self._requests:
+            job = _SpawnLocationJob(list(self._requests.values()))
+            self._requests.clear()
 
+            self._start()
+            self._jobs.put(job)
+            self.pending += 1
 
-class _SpawnLocationManager(list):
+        while self._results:
+            self._apply(*self._results.popleft())
+
+    def clear(self):
+        """Drop all pending spawn requests and start a new level."""
+        self._requests.clear()
+        self.level += 1
+
+    def stop(self):
+        """Stop the worker thread."""
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread = None
+
+    @property
+    def queue_depth(self):
+        """Return the number of spawn requests and jobs which have not been applied yet."""
+        return len(self._requests) + self.pending
+
+    @property
+    def latency_average(self):
+        """Return the average time between submitting and applying a job (in seconds)."""
+        return self.latency_total / self.applied if self.applied else 0.0
+
+    def _start(self):
+        """Start the worker thread, if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = GameThread(target=self._work, args=(self._jobs, self._results), daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _work(jobs, results):
+        """Assign spawn locations to jobs until the stop signal is received."""
+        while True:
+            job = jobs.get()
+
+            if job is None:
+                return
+
+            start = perf_counter()
+
+            try:
+                spawn_locations = spawn_location_finder.assign(job)
+            except Exception:
+                except_hooks.print_exception()
+                spawn_locations = list()
+
+            results.append((job, spawn_locations, perf_counter() - start))
+
+    def _apply(self, job, spawn_locations, elapsed):
+        """Move the job's players to their spawn locations, if they are still alive."""
+        self.pending -= 1
+        hook_stats.add('spawn_locations._SpawnLocationFinder.assign', elapsed)
+
+        # Drop results of jobs submitted on a previous level
+        if job.level != self.level:
+            return
+
+        for userid, spawn_location in zip(job.userids, spawn_locations):
+            with suppress(ValueError):
+                player = player_cache.from_userid(userid)
+
+                if not player.dead:
+                    spawn_location.move_player(player)
+
+        latency = perf_counter() - job.submitted
+        self.applied += 1
+        self.latency_last = latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_total += latency
+
+
+class _PlayerOriginSnapshot(object):
+    """Class used to take a snapshot of all alive player origins at most once per server tick."""
+
+    def __init__(self):
+        """Object initialization."""
+        self._tick = None
+        self._snapshot = ((), (), ())
+
+    def get(self):
+        """Return the userids, origins and teams of all alive players."""
+        if self._tick != global_vars.tick_count:
+            self._tick = global_vars.tick_count
+
+            userids, origins, teams = list(), list(), list()
+
+            for player in PlayerIter(is_filters='alive'):
+                origin = player.origin
+                userids.append(player.userid)
+                origins.append((origin.x, origin.y, origin.z))
+                teams.append(player.team)
+
+            self._snapshot = (tuple(userids), tuple(origins), tuple(teams))
+
+        return self._snapshot
+
+    def reset(self):
+        """Forget the current snapshot."""
+        self._tick = None
+        self._snapshot = ((), (), ())
+
+
+class _PlayerOriginIndex(SpatialGrid):
+    """Class used to keep a spatial index of alive player origins.
+
+        * players only change cells when they have actually moved into another one
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        super().__init__(SAFE_SPAWN_DISTANCE)
+
+    def update(self, userids, origins):
+        """Move all alive players to their current origins and remove all other players."""
+        for userid, (x, y, z) in zip(userids, origins):
+            self.move(userid, x, y, z)
+
+        for userid in set(self.keys()).difference(userids):
+            self.remove(userid)
+
+    def has_others(self, userid):
+        """Return whether any player other than `userid` is alive."""
+        return len(self) > (userid in self)
+
+
+class _SpawnLocationReservations(SpatialGrid):
+    """Class used to keep spawn locations which have just been handed out from being handed out again."""
+
+    def __init__(self):
+        """Object initialization."""
+        super().__init__(SAFE_SPAWN_DISTANCE)
+
+        # Store the server time each reservation expires at
+        self._expiry = dict()
+
+    def reserve(self, index, origin, curtime):
+        """Reserve the spawn location at `index` for `SPAWN_LOCATION_RESERVATION_TIME` seconds."""
+        self.insert(index, *origin)
+        self._expiry[index] = curtime + SPAWN_LOCATION_RESERVATION_TIME
+
+    def purge(self, curtime):
+        """Remove all reservations expired at the server time."""
+        for index, expiry in list(self._expiry.items()):
+            if expiry <= curtime:
+                del self._expiry[index]
+                self.remove(index)
+
+    def reset(self):
+        """Remove all reservations."""
+        self.clear()
+        self._expiry.clear()
+
+
+class _SpawnLocationManager(SpawnLocationStore):
     """Class used to provide spawn location management.
 
         * load spawn locations from a JSON file
-        * save spawn locations to a JSON file
+        * record changes in a journal file and write them to the JSON file in the background
+        * hand out `SpawnLocation` views of the stored spawn locations
     """
 
+    def __init__(self):
+        """Object initialization."""
+        super().__init__()
+
+        # Store the spawn location origins as a NumPy array (spawn locations x 3), built on demand
+        self._origins_array = None
+        self._origins_array_version = None
+
+        # Store a copy of the spawn locations, taken on demand
+        self._snapshot = None
+
+        # Store a spatial index of the spawn locations, built on demand
+        self._grid = None
+        self._grid_version = None
+
+        # Store the distances between all spawn locations and the version they have been calculated for, and the
+        #   thread calculating them in the background and the version it calculates them for
+        self._distance_matrix = (None, None)
+        self._distance_matrix_build = (None, None)
+
+        # Store the journal of changes not yet written to the JSON file, and the thread writing them
+        self.journal = SpawnLocationJournal()
+        self._compaction = None
+
+    def __getitem__(self, index):
+        """Return a `SpawnLocation` view of the spawn location at `index`."""
+        return SpawnLocation(*self.origin(index), self.angle(index))
+
+    def __iter__(self):
+        """Yield a `SpawnLocation` view of each spawn location."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, spawn_location):
+        """Add a spawn location."""
+        self.add((spawn_location.x, spawn_location.y, spawn_location.z), spawn_location._angle)
+
+    def insert(self, index, origin, angle):
+        """Insert a spawn location from xyz-coordinates and an angle before `index`."""
+        index = min(max(index, 0), len(self))
+        grid_current = self._grid_version == self.version
+
+        super().insert(index, origin, angle)
+
+        # Keep the spatial index up to date by shifting the indexes of all following spawn locations
+        if grid_current:
+            for moved_index in range(len(self) - 1, index, -1):
+                self._grid.remove(moved_index - 1)
+                self._grid.insert(moved_index, *self.origin(moved_index))
+
+            self._grid.insert(index, *origin)
+            self._grid_version = self.version
+
+    def pop(self, index):
+        """Remove the spawn location at `index` and return its origin and angle."""
+        index = self._check_index(index)
+        grid_current = self._grid_version == self.version
+
+        origin, angle = super().pop(index)
+
+        # Keep the spatial index up to date by shifting the indexes of all following spawn locations
+        if grid_current:
+            self._grid.remove(index)
+
+            for moved_index in range(index, len(self)):
+                self._grid.remove(moved_index + 1)
+                self._grid.insert(moved_index, *self.origin(moved_index))
+
+            self._grid_version = self.version
+
+        return origin, angle
+
+    def clear(self):
+        """Remove all spawn locations."""
+        super().clear()
+        self._distance_matrix = (None, None)
+
+    def add_spawn_location(self, spawn_location):
+        """Add a spawn location and record it in the journal."""
+        origin, angle = (spawn_location.x, spawn_location.y, spawn_location.z), spawn_location._angle
+        self.journal.append('add', len(self), origin, angle)
+        self.add(origin, angle)
+
+    def remove_spawn_location(self, index):
+        """Remove the spawn location at `index` and record it in the journal."""
+        index = self._check_index(index)
+        self.journal.append('remove', index, self.origin(index), self.angle(index))
+        self.pop(index)
+
+    def undo(self):
+        """Undo the last recorded change and return its record, or None if there is nothing to undo."""
+        # Changes which are being written to the JSON file cannot be undone anymore
+        if self.is_saving:
+            return None
+
+        record = self.journal.pop()
+
+        if record is not None:
+            self._apply_record(record, undo=True)
+
+        return record
+
+    def snapshot(self):
+        """Return a copy of the spawn locations which is never changed, so it can be used on any thread."""
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = self.copy()
+
+        # Hand out the distance matrix as soon as it has been calculated
+        self._snapshot._distance_matrix = self._distance_matrix
+
+        return self._snapshot
+
+    @property
+    def distance_matrix(self):
+        """Return the distances between all spawn locations, or None if they have not been calculated (yet)."""
+        version, distance_matrix = self._distance_matrix
+        return distance_matrix if version == self.version else None
+
+    def prepare_distance_matrix(self):
+        """Calculate the distances between all spawn locations in the background, unless it has already been done.
+
+        The distance matrix file is used if it has been generated for the JSON file the spawn locations are read from.
+        Changes to the spawn locations drop the distances, so they are calculated again the next time.
+        """
+        if not self or self.distance_matrix is not None:
+            return
+
+        version, thread = self._distance_matrix_build
+
+        if version == self.version and thread.is_alive():
+            return
+
+        thread = GameThread(
+            target=self._build_distance_matrix, args=(self.snapshot(), self.distance_matrix_file), daemon=True
+        )
+        self._distance_matrix_build = (self.version, thread)
+        thread.start()
+
+    @property
+    def grid(self):
+        """Return a spatial index of the spawn locations, keyed by their indexes."""
+        if self._grid_version != self.version:
+            self._grid = SpatialGrid(SAFE_SPAWN_DISTANCE)
+            self._grid_version = self.version
+
+            for index in range(len(self)):
+                self._grid.insert(index, *self.origin(index))
+
+        return self._grid
+
+    @property
+    def origins(self):
+        """Return the spawn location origins as a NumPy array (spawn locations x 3)."""
+        if self._origins_array_version != self.version:
+            self._origins_array = numpy.array(self._origins, dtype=float).reshape(-1, 3)
+            self._origins_array_version = self.version
+
+        return self._origins_array
+
     def load(self):
         """Load spawn locations from the spawn locations data file for the current map."""
-        # Skip if the file doesn't exist
-        if not self.json_file.exists():
-            return
+        # Wait for the spawn locations of the previous map to be written
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+        self._load_spawn_locations()
 
-        # Read the spawn locations data file into memory
-        with self.json_file.open() as f:
-            contents = json.load(f)
+        # Apply all changes recorded since the JSON file has last been written (up to the first invalid one)
+        with suppress(IndexError, KeyError, TypeError):
+            for record in self.journal.open(self.journal_file, self.source_hash):
+                self._apply_record(record)
 
-        # Append each entry as a `SpawnLocation` object
-        for data in contents:
-            self.append(SpawnLocation(*data['vector'], QAngle(*data['angle'])))
+        # Only the scored spawn location selection mode needs the distances between all spawn locations
+        if str(cvar_spawn_location_mode) == 'scored':
+            self.prepare_distance_matrix()
 
     def save(self):
-        """Save spawn locations to the spawn locations data file for the current map."""
+        """Write all recorded changes to the spawn locations data file for the current map in the background."""
         # Skip if we have nothing to save
         if not self:
             return
 
-        # Dump the contents of this list to file
-        with self.json_file.open('w') as f:
-            json.dump([spawn_location.json for spawn_location in self], f, indent=4)
+        # Write a copy of the spawn locations, so changes can still be made (and recorded) meanwhile
+        self._compaction = GameThread(
+            target=self._compact,
+            args=(
+                self.snapshot(), len(self.journal), self.json_file, self.binary_file, self.distance_matrix_file
+            ),
+            daemon=True
+        )
+        self._compaction.start()
+
+    @property
+    def is_saving(self):
+        """Return whether the spawn locations are being written to file."""
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def _compact(self, snapshot, journal_count, json_file, binary_file, distance_matrix_file):
+        """Write the spawn locations to file and remove the changes written from the journal."""
+        try:
+            # Use a separate copy, since writing sets its source hash
+            spawn_locations = snapshot.copy()
+            source_hash = spawn_locations.write_json(json_file)
+
+            with suppress(OSError):
+                spawn_locations.write_binary(binary_file, source_hash)
+
+                if snapshot.distance_matrix is not None:
+                    snapshot.distance_matrix.write(distance_matrix_file, source_hash)
+
+            self.journal.discard(journal_count, source_hash)
+
+        except Exception:
+            except_hooks.print_exception()
+
+    def _build_distance_matrix(self, spawn_locations, distance_matrix_file):
+        """Read or calculate the distances between all spawn locations of the snapshot and hand them out when done."""
+        try:
+            source_hash = spawn_locations.source_hash
+            distance_matrix = None
+
+            if source_hash is not None:
+                distance_matrix = SpawnDistanceMatrix.read(distance_matrix_file, source_hash)
+
+            if distance_matrix is None:
+                distance_matrix = SpawnDistanceMatrix.from_store(spawn_locations)
+
+                if source_hash is not None:
+                    with suppress(OSError):
+                        distance_matrix.write(distance_matrix_file, source_hash)
+
+            # Drop the distances if the spawn locations have changed meanwhile
+            if spawn_locations.version == self.version:
+                self._distance_matrix = (spawn_locations.version, distance_matrix)
+
+        except Exception:
+            except_hooks.print_exception()
+
+    def _apply_record(self, record, undo=False):
+        """Apply (or undo) a journal record."""
+        if (record['op'] == 'add') != undo:
+            self.insert(record['index'], record['vector'], record['angle'])
+        else:
+            self.pop(record['index'])
+
+    def _load_spawn_locations(self):
+        """Load spawn locations from the binary file or the JSON file for the current map."""
+        json_file, binary_file = self.json_file, self.binary_file
+
+        # Skip if the file doesn't exist
+        if not json_file.exists():
+            return
+
+        # Use the binary file if it has been generated from the JSON file as it is now, since modification times
+        #   can't be trusted (i.e. files restored by git checkout, cp -p or rsync keep older ones)
+        if binary_file.exists() and self.read_binary(binary_file, file_hash(json_file)):
+
+            # Mark the binary file as up to date again, if the JSON file has been touched without changing it
+            if binary_file.mtime < json_file.mtime:
+                with suppress(OSError):
+                    os.utime(binary_file)
+
+            return
+
+        # Read the spawn locations data file into memory and regenerate the binary file from it
+        source_hash = self.read_json(json_file)
+
+        with suppress(OSError):
+            self.write_binary(binary_file, source_hash)
 
     @property
     def json_file(self):
         """Return the path to the JSON file for the current map."""
         return _spawn_locations_path.joinpath(global_vars.map_name + '.json')
 
+    @property
+    def binary_file(self):
+        """Return the path to the binary file generated from the JSON file for the current map."""
+        return _spawn_locations_path.joinpath(global_vars.map_name + '.bin')
+
+    @property
+    def distance_matrix_file(self):
+        """Return the path to the spawn location distance matrix file for the current map."""
+        return _spawn_locations_path.joinpath(global_vars.map_name + '.dist')
+
+    @property
+    def journal_file(self):
+        """Return the path to the journal file for the current map."""
+        return _spawn_locations_path.joinpath(global_vars.map_name + '.journal')
+
 
 # =============================================================================
 # >> PUBLIC GLOBAL VARIABLES
 # =============================================================================
+# Store a global instance of `_PlayerOriginSnapshot`
+player_origin_snapshot = _PlayerOriginSnapshot()
+
+# Store a global instance of `_SpawnLocationFinder`
+spawn_location_finder = _SpawnLocationFinder()
+
+# Store a global instance of `_SpawnLocationDispatcher`
+spawn_location_dispatcher = _SpawnLocationDispatcher()
+
 # Store a global instance of `_SpawnLocationManager`
 spawn_locations_manager = _SpawnLocationManager()
 
@@ -174,7 +1100,18 @@ spawn_locations_manager.load()
 # >> LISTENERS
 # =============================================================================
 @OnLevelInit
+@hook_stats.measure
 def on_level_init(map_name):
     """Reload spawn locations."""
+    spawn_location_dispatcher.clear()
+    spawn_location_finder.reset()
+    player_origin_snapshot.reset()
     spawn_locations_manager.clear()
     spawn_locations_manager.load()
+
+
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Submit spawn requests made since the last tick and move the players of finished requests."""
+    spawn_location_dispatcher.dispatch()
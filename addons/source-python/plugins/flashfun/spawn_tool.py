@@ -0,0 +1,271 @@
+# ../flashfun/spawn_tool.py
+
+"""Provides an offline tool to check, deduplicate and thin spawn location data files.
+
+Runs without a game server, from the plugins directory:
+
+    python -m flashfun.spawn_tool [--thin OUTPUT_DIRECTORY] [paths ...]
+
+Exits with status 1 if any spawn locations are duplicates or closer to each other than the safe spawn distance.
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Argparse
+from argparse import ArgumentParser
+#   Concurrent
+from concurrent.futures import ProcessPoolExecutor
+#   JSON
+import json
+#   OS
+import os
+#   Statistics
+from statistics import median
+#   Sys
+import sys
+
+# Site-Packages Imports
+#   NumPy
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Script Imports
+#   Spawn Data
+from flashfun.spawn_data import SAFE_SPAWN_DISTANCE
+from flashfun.spawn_data import SpawnDistanceMatrix
+from flashfun.spawn_data import SpawnLocationStore
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Default spawn locations data directory
+DEFAULT_SPAWN_LOCATIONS_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data', 'plugins', 'flashfun', 'spawn_locations'
+))
+
+# Distance below which two spawn locations are considered duplicates (in units)
+DUPLICATE_SPAWN_DISTANCE = 1.0
+
+# Number of scaled median absolute deviations a nearest neighbour distance may exceed the median by
+OUTLIER_DEVIATIONS = 5.0
+
+# Scale factor making the median absolute deviation comparable to the standard deviation
+_MAD_SCALE = 1.4826
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def get_distances(store):
+    """Return the distances between all pairs of spawn locations as rows (a NumPy array, if available)."""
+    if numpy is not None:
+        origins = numpy.array(store._origins, dtype=float).reshape(-1, 3)
+        return numpy.sqrt(((origins[:, None, :] - origins[None, :, :]) ** 2).sum(axis=2))
+
+    matrix = SpawnDistanceMatrix.from_store(store)
+    return [matrix.row(index) for index in range(matrix.count)]
+
+
+def get_close_pairs(distances, limit):
+    """Return (a, b, distance) for every pair of spawn locations closer than `limit` to each other."""
+    if numpy is not None:
+        a, b = numpy.nonzero(numpy.triu(distances < limit, 1))
+        return list(zip(a.tolist(), b.tolist(), distances[a, b].tolist()))
+
+    return [
+        (a, b, row[b]) for a, row in enumerate(distances) for b in range(a + 1, len(row)) if row[b] < limit
+    ]
+
+
+def get_nearest_distances(distances):
+    """Return the distance of each spawn location to its nearest neighbour."""
+    if numpy is not None:
+        if len(distances) < 2:
+            return []
+
+        others = distances + numpy.diag(numpy.full(len(distances), numpy.inf))
+        return others.min(axis=1).tolist()
+
+    return [min(row[:index] + row[index + 1:]) for index, row in enumerate(distances) if len(row) > 1]
+
+
+def get_outliers(nearest_distances, deviations=OUTLIER_DEVIATIONS):
+    """Return (index, distance) for every spawn location unusually far away from all others."""
+    if len(nearest_distances) < 3:
+        return []
+
+    middle = median(nearest_distances)
+    spread = _MAD_SCALE * median(abs(distance - middle) for distance in nearest_distances)
+
+    # Nothing stands out if (almost) all spawn locations are spaced alike
+    if not spread:
+        return []
+
+    return [
+        (index, distance) for index, distance in enumerate(nearest_distances)
+        if distance > middle + deviations * spread
+    ]
+
+
+def get_thinned_indexes(distances, limit):
+    """Return the indexes of a subset of spawn locations at least `limit` apart from each other.
+
+    Uses farthest point sampling: each step keeps the spawn location farthest away from all kept ones,
+    which spreads the kept spawn locations out over the whole map.
+    """
+    count = len(distances)
+
+    if not count:
+        return []
+
+    # Start with the spawn location farthest away from all others on average
+    if numpy is not None:
+        first = int(distances.sum(axis=1).argmax())
+        gaps = distances[first].copy()
+    else:
+        first = max(range(count), key=lambda index: sum(distances[index]))
+        gaps = list(distances[first])
+
+    kept = [first]
+
+    while len(kept) < count:
+        if numpy is not None:
+            candidate = int(gaps.argmax())
+        else:
+            candidate = max(range(count), key=gaps.__getitem__)
+
+        # Stop once the farthest spawn location is too close to a kept one
+        if gaps[candidate] < limit:
+            break
+
+        kept.append(candidate)
+
+        if numpy is not None:
+            numpy.minimum(gaps, distances[candidate], out=gaps)
+        else:
+            gaps = [min(gap, distance) for gap, distance in zip(gaps, distances[candidate])]
+
+    return sorted(kept)
+
+
+def check_file(path, distance=SAFE_SPAWN_DISTANCE, thin_path=None):
+    """Check a spawn locations JSON file and return a report, optionally write a thinned copy to `thin_path`."""
+    store = SpawnLocationStore()
+    report = {'file': path, 'count': 0}
+
+    try:
+        store.read_json(path)
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        report['error'] = f'{type(error).__name__}: {error}'
+        return report
+
+    distances = get_distances(store)
+    close_pairs = get_close_pairs(distances, distance)
+
+    report['count'] = len(store)
+    report['duplicates'] = [pair for pair in close_pairs if pair[2] < DUPLICATE_SPAWN_DISTANCE]
+    report['close_pairs'] = [pair for pair in close_pairs if pair[2] >= DUPLICATE_SPAWN_DISTANCE]
+    report['outliers'] = get_outliers(get_nearest_distances(distances))
+
+    if thin_path is not None:
+        kept = get_thinned_indexes(distances, distance)
+        thinned = SpawnLocationStore()
+
+        for index in kept:
+            thinned.add(store.origin(index), store.angle(index))
+
+        os.makedirs(os.path.dirname(thin_path), exist_ok=True)
+        thinned.write_json(thin_path)
+
+        report['thinned'] = len(kept)
+
+    return report
+
+
+def find_files(paths):
+    """Return all spawn locations JSON files in `paths` (files or directories)."""
+    files = list()
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith('.json'))
+        else:
+            files.append(path)
+
+    return sorted(files)
+
+
+def _print_report(report):
+    """Print a report in a human readable form."""
+    if 'error' in report:
+        print(f'{report["file"]}: ERROR {report["error"]}')
+        return
+
+    print(f'{report["file"]}: {report["count"]} spawn locations', end='')
+    print(f', {report["thinned"]} kept after thinning' if 'thinned' in report else '')
+
+    for a, b, distance in report['duplicates']:
+        print(f'    duplicate: #{a + 1} and #{b + 1} ({distance:.1f} units)')
+
+    for a, b, distance in report['close_pairs']:
+        print(f'    too close: #{a + 1} and #{b + 1} ({distance:.1f} units)')
+
+    for index, distance in report['outliers']:
+        print(f'    outlier: #{index + 1} ({distance:.1f} units to the nearest spawn location)')
+
+
+def main(args=None):
+    """Check all given spawn locations files and return the exit status."""
+    parser = ArgumentParser(prog='python -m flashfun.spawn_tool', description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'paths', nargs='*', default=[DEFAULT_SPAWN_LOCATIONS_PATH],
+        help='spawn locations JSON files or directories (default: the plugin data directory)'
+    )
+    parser.add_argument(
+        '--distance', type=float, default=SAFE_SPAWN_DISTANCE,
+        help=f'minimum distance between spawn locations (default: {SAFE_SPAWN_DISTANCE})'
+    )
+    parser.add_argument(
+        '--thin', metavar='OUTPUT_DIRECTORY',
+        help='write thinned spawn locations files (keeping the directory layout) to this directory'
+    )
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true', help='print the reports as JSON')
+    options = parser.parse_args(args)
+
+    files = find_files(options.paths)
+
+    # Mirror the layout below the common directory of all files for thinned files
+    if options.thin is not None and files:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(file)) for file in files])
+        thin_paths = [
+            os.path.join(options.thin, os.path.relpath(os.path.abspath(file), base)) for file in files
+        ]
+    else:
+        thin_paths = [None] * len(files)
+
+    with ProcessPoolExecutor(options.jobs) as executor:
+        reports = list(executor.map(check_file, files, [options.distance] * len(files), thin_paths))
+
+    if options.json:
+        json.dump(reports, sys.stdout, indent=4)
+        print()
+    else:
+        for report in reports:
+            _print_report(report)
+
+    # Fail on unreadable files, duplicates and spawn locations too close to each other
+    return int(any('error' in report or report['duplicates'] or report['close_pairs'] for report in reports))
+
+
+# =============================================================================
+# >> MAIN
+# =============================================================================
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# ../flashfun/stats.py
+
+"""Provides call count and latency histograms of the plugin's hooks."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Bisect
+from bisect import bisect_left
+#   Functools
+from functools import wraps
+#   Time
+from time import perf_counter
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Upper bounds of the latency histogram buckets (in seconds), the last bucket holds all slower calls
+HISTOGRAM_BUCKET_BOUNDS = (
+    1e-6, 2e-6, 5e-6,
+    1e-5, 2e-5, 5e-5,
+    1e-4, 2e-4, 5e-4,
+    1e-3, 2e-3, 5e-3,
+    1e-2, 2e-2, 5e-2,
+    1e-1,
+)
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _Histogram(object):
+    """Class used to count the calls of a hook by latency bucket."""
+
+    __slots__ = ('counts', 'calls', 'total', 'max')
+
+    def __init__(self):
+        """Object initialization."""
+        self.reset()
+
+    def add(self, elapsed):
+        """Count a call which took `elapsed` seconds."""
+        self.counts[bisect_left(HISTOGRAM_BUCKET_BOUNDS, elapsed)] += 1
+        self.calls += 1
+        self.total += elapsed
+
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def get_percentile(self, percentile):
+        """Return the upper bound of the bucket holding the percentile (in seconds), at most the maximum latency."""
+        if not self.calls:
+            return 0.0
+
+        rank = self.calls * percentile / 100
+        count = 0
+
+        for bound, bucket_count in zip(HISTOGRAM_BUCKET_BOUNDS, self.counts):
+            count += bucket_count
+
+            if count >= rank:
+                return min(bound, self.max)
+
+        return self.max
+
+    def reset(self):
+        """Drop all counted calls."""
+        self.counts = [0] * (len(HISTOGRAM_BUCKET_BOUNDS) + 1)
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class _HookStats(object):
+    """Class used to measure the latency of the plugin's hooks.
+
+        * hooks are wrapped once when they are defined, each one gets a fixed-bucket histogram
+        * measuring is disabled by default, disabled wrappers only check a flag before calling the hook
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self.enabled = False
+        self._histograms = dict()
+
+    def measure(self, function):
+        """Decorator used to measure the calls of the function, named `<module>.<function>`."""
+        name = f'{function.__module__.rpartition(".")[2]}.{function.__qualname__}'
+        histogram = self._histograms.setdefault(name, _Histogram())
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return function(*args, **kwargs)
+
+            start = perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter() - start)
+
+        return wrapper
+
+    def add(self, name, elapsed):
+        """Count a call of the hook `name` which has been measured elsewhere (i.e. on another thread), if enabled."""
+        if self.enabled:
+            self._histograms.setdefault(name, _Histogram()).add(elapsed)
+
+    def get_histograms(self):
+        """Return the histograms of all hooks: {name: histogram}."""
+        return dict(self._histograms)
+
+    def get_report(self):
+        """Return one line with the calls and the p50/p99/max latency (in milliseconds) of each hook called."""
+        lines = [f'{"Hook":<48}{"Calls":>10}{"p50":>10}{"p99":>10}{"Max":>10}']
+
+        for name, histogram in sorted(self._histograms.items()):
+            if not histogram.calls:
+                continue
+
+            lines.append(
+                f'{name:<48}{histogram.calls:>10}'
+                f'{histogram.get_percentile(50) * 1000:>10.3f}'
+                f'{histogram.get_percentile(99) * 1000:>10.3f}'
+                f'{histogram.max * 1000:>10.3f}'
+            )
+
+        return lines
+
+    def reset(self):
+        """Drop the counted calls of all hooks."""
+        for histogram in self._histograms.values():
+            histogram.reset()
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+hook_stats = _HookStats()
@@ -0,0 +1,156 @@
+# ../flashfun/streaks.py
+
+"""Provides kill streak tracking."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Array
+from array import array
+
+# Source.Python Imports
+#   Events
+from events import Event
+#   Listeners
+from listeners import OnClientActive
+from listeners import OnClientDisconnect
+from listeners import OnLevelInit
+
+# Plugin Imports
+#   Config
+from flashfun.config import cvar_multi_kill_window
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Number of player slots (player indexes start at 1)
+MAX_PLAYER_SLOTS = 65
+
+# Reward trigger types which are tracked by the streak tracker instead of being read from the player entity
+#   kills: enemy kills in the current match (since the map has started, the warmup has ended or the game has restarted)
+#   streak: enemy kills since the player's last death
+#   life_kills: enemy kills since the player's last spawn
+#   multi_kills: enemy kills in quick succession (see flashfun_multi_kill_window)
+STREAK_TRIGGERS = ('kills', 'streak', 'life_kills', 'multi_kills')
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _StreakTracker(object):
+    """Class used to keep kill streak counters for all players.
+
+        * counters are stored in compact arrays indexed by player index
+        * counters are only updated from game events, so no entity properties have to be read
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store one counter array per streak trigger
+        self._counters = {trigger: array('i', [0]) * MAX_PLAYER_SLOTS for trigger in STREAK_TRIGGERS}
+
+        # Store the time of each player's last kill, for multi-kills
+        self._last_kill_times = array('d', [0.0]) * MAX_PLAYER_SLOTS
+
+    def on_kill(self, index, curtime):
+        """Count an enemy kill for the player."""
+        counters = self._counters
+        counters['kills'][index] += 1
+        counters['streak'][index] += 1
+        counters['life_kills'][index] += 1
+
+        # Continue the multi-kill if the last kill was recent enough, or start a new one
+        if curtime - self._last_kill_times[index] <= float(cvar_multi_kill_window):
+            counters['multi_kills'][index] += 1
+        else:
+            counters['multi_kills'][index] = 1
+
+        self._last_kill_times[index] = curtime
+
+    def on_death(self, index):
+        """End the player's streak."""
+        self._counters['streak'][index] = 0
+        self._counters['multi_kills'][index] = 0
+
+    def on_spawn(self, index):
+        """Start counting the player's kills for their new life."""
+        self._counters['life_kills'][index] = 0
+
+    def get(self, index, trigger):
+        """Return the player's counter for the streak trigger."""
+        return self._counters[trigger][index]
+
+    def get_trigger_value(self, player, trigger, values=None):
+        """Return the player's value for a reward trigger, reading the player entity only for untracked triggers.
+
+        If `values` is given, values read from the player entity are stored in it and taken from it afterwards,
+        so they can be changed before they are set on the player: {trigger: value}
+        """
+        counters = self._counters.get(trigger)
+
+        if counters is not None:
+            return counters[player.index]
+
+        if values is None:
+            return getattr(player, trigger)
+
+        if trigger not in values:
+            values[trigger] = getattr(player, trigger)
+
+        return values[trigger]
+
+    def reset(self, index):
+        """Reset all counters of the player slot."""
+        for counters in self._counters.values():
+            counters[index] = 0
+
+        self._last_kill_times[index] = 0.0
+
+    def clear(self):
+        """Reset all counters of all player slots."""
+        for index in range(MAX_PLAYER_SLOTS):
+            self.reset(index)
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+streak_tracker = _StreakTracker()
+
+
+# =============================================================================
+# >> GAME EVENTS
+# =============================================================================
+@Event('round_announce_match_start')
+@hook_stats.measure
+def on_round_announce_match_start(game_event):
+    """Reset all counters when the match starts after the warmup or a restart, like the scoreboard does."""
+    streak_tracker.clear()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnClientActive
+@hook_stats.measure
+def on_client_active(index):
+    """Start with fresh counters for the new player."""
+    streak_tracker.reset(index)
+
+
+@OnClientDisconnect
+@hook_stats.measure
+def on_client_disconnect(index):
+    """Reset the counters of the disconnecting player's slot."""
+    streak_tracker.reset(index)
+
+
+@OnLevelInit
+@hook_stats.measure
+def on_level_init(map_name):
+    """Reset all counters for the new map."""
+    streak_tracker.clear()
@@ -0,0 +1,335 @@
+# ../flashfun/trace.py
+
+"""Provides recording the game events this plugin handles into a compact binary trace file."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Contextlib
+from contextlib import suppress
+#   Struct
+from struct import Struct
+#   Time
+from time import strftime
+
+# Source.Python Imports
+#   Engines
+from engines.server import global_vars
+#   Entities
+from entities.hooks import EntityPreHook
+from entities.hooks import EntityCondition
+#   Events
+from events import Event
+#   Filters
+from filters.players import PlayerIter
+#   Listeners
+from listeners import OnClientActive
+from listeners import OnClientDisconnect
+from listeners import OnEntityDeleted
+from listeners import OnEntitySpawned
+from listeners import OnLevelInit
+#   Memory
+from memory import make_object
+#   Paths
+from paths import PLUGIN_DATA_PATH
+#   Players
+from players.entity import Player
+#   Weapons
+from weapons.entity import Weapon
+
+# Plugin Imports
+#   Info
+from flashfun.info import info
+#   Player Cache
+from flashfun.player_cache import player_cache
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Trace file header: magic, format version and the tick interval (in seconds)
+TRACE_HEADER = Struct('<4sHd')
+TRACE_MAGIC = b'FFTR'
+TRACE_VERSION = 1
+
+# Record types
+TRACE_STRING = 0
+TRACE_LEVEL_INIT = 1
+TRACE_PLAYER_ACTIVE = 2
+TRACE_PLAYER_DISCONNECT = 3
+TRACE_PLAYER_SPAWN = 4
+TRACE_PLAYER_DEATH = 5
+TRACE_WEAPON_FIRE = 6
+TRACE_BUMP_WEAPON = 7
+TRACE_DROP_WEAPON = 8
+TRACE_ENTITY_SPAWNED = 9
+TRACE_ENTITY_DELETED = 10
+
+# Record layouts, each starting with the record type and the tick it has been recorded in
+#   strings (classnames, weapon and map names) are written once and referenced by their id afterwards
+TRACE_RECORDS = {
+    TRACE_STRING: Struct('<BIHH'),                  # string id, length of the UTF-8 bytes following the record
+    TRACE_LEVEL_INIT: Struct('<BIH'),               # map name id
+    TRACE_PLAYER_ACTIVE: Struct('<BIBH'),           # player index, userid
+    TRACE_PLAYER_DISCONNECT: Struct('<BIB'),        # player index
+    TRACE_PLAYER_SPAWN: Struct('<BIHB'),            # userid, team
+    TRACE_PLAYER_DEATH: Struct('<BIHH'),            # userid, attacker userid
+    TRACE_WEAPON_FIRE: Struct('<BIHH'),             # userid, weapon name id
+    TRACE_BUMP_WEAPON: Struct('<BIBHH'),            # player index, weapon index, weapon classname id
+    TRACE_DROP_WEAPON: Struct('<BIBHH'),            # player index, active weapon index and classname id (or 0)
+    TRACE_ENTITY_SPAWNED: Struct('<BIHH'),          # entity index, classname id
+    TRACE_ENTITY_DELETED: Struct('<BIH'),           # entity index
+}
+
+# Record types whose last value is a string id
+_STRING_RECORDS = frozenset(
+    (TRACE_LEVEL_INIT, TRACE_WEAPON_FIRE, TRACE_BUMP_WEAPON, TRACE_DROP_WEAPON, TRACE_ENTITY_SPAWNED)
+)
+
+# Size of the buffer which is written to the trace file once it is full (in bytes)
+TRACE_FLUSH_SIZE = 64 * 1024
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _TraceRecorder(object):
+    """Class used to record the game events this plugin handles.
+
+        * records are packed into a buffer, which is written to the trace file once it is full
+        * the listeners below only check whether recording is on, while it is off
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        self.recording = False
+        self.path = None
+        self.records = 0
+
+        self._file = None
+        self._buffer = bytearray()
+        self._strings = dict()
+
+    def start(self, name=None):
+        """Start recording into a new trace file in the traces data directory and return its path."""
+        self.stop()
+
+        directory = PLUGIN_DATA_PATH.joinpath(info.name, 'traces')
+        directory.makedirs_p()
+
+        self.path = directory.joinpath(f'{name or strftime("%Y%m%d-%H%M%S")}.fftrace')
+        self._file = open(self.path, 'wb')
+        self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, global_vars.interval_per_tick))
+
+        self.records = 0
+        self._strings.clear()
+        self.recording = True
+
+        # Start with the current map and the players already in the game
+        self.record(TRACE_LEVEL_INIT, self.get_string_id(global_vars.map_name))
+
+        for player in PlayerIter():
+            self.record(TRACE_PLAYER_ACTIVE, player.index, player.userid)
+
+            if not player.dead:
+                self.record(TRACE_PLAYER_SPAWN, player.userid, player.team)
+
+        return self.path
+
+    def stop(self):
+        """Stop recording and close the trace file."""
+        if self._file is None:
+            return
+
+        self.recording = False
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def record(self, record_type, *values):
+        """Add a record for the current tick."""
+        self._buffer += TRACE_RECORDS[record_type].pack(record_type, global_vars.tick_count, *values)
+        self.records += 1
+
+        if len(self._buffer) >= TRACE_FLUSH_SIZE:
+            self.flush()
+
+    def get_string_id(self, text):
+        """Return the id of the text, recording the text the first time it is used."""
+        string_id = self._strings.get(text)
+
+        if string_id is None:
+            string_id = self._strings[text] = len(self._strings) + 1
+            data = text.encode('utf-8')
+            self.record(TRACE_STRING, string_id, len(data))
+            self._buffer += data
+
+        return string_id
+
+    def flush(self):
+        """Write the buffered records to the trace file."""
+        if self._file is not None and self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+trace_recorder = _TraceRecorder()
+
+
+# =============================================================================
+# >> FUNCTIONS
+# =============================================================================
+def read_trace(path):
+    """Return the tick interval of the trace file and a generator of its records: (record type, tick, values).
+
+    String records are resolved, so the values of all other records contain the strings instead of their ids.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, interval_per_tick = TRACE_HEADER.unpack_from(data)
+
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f'Unsupported trace file: {path}')
+
+    return interval_per_tick, _iter_records(data, TRACE_HEADER.size)
+
+
+def _iter_records(data, offset):
+    """Yield the records from the trace data, starting at the offset."""
+    strings = {0: None}
+
+    while offset < len(data):
+        record_type = data[offset]
+        layout = TRACE_RECORDS[record_type]
+        _, tick, *values = layout.unpack_from(data, offset)
+        offset += layout.size
+
+        if record_type == TRACE_STRING:
+            string_id, length = values
+            strings[string_id] = data[offset:offset + length].decode('utf-8')
+            offset += length
+            continue
+
+        if record_type in _STRING_RECORDS:
+            values[-1] = strings[values[-1]]
+
+        yield record_type, tick, values
+
+
+# =============================================================================
+# >> GAME EVENTS
+# =============================================================================
+@Event('player_spawn')
+def on_player_spawn(game_event):
+    """Record the spawning player."""
+    if not trace_recorder.recording:
+        return
+
+    with suppress(ValueError):
+        userid = game_event['userid']
+        trace_recorder.record(TRACE_PLAYER_SPAWN, userid, player_cache.from_userid(userid).team)
+
+
+@Event('player_death')
+def on_player_death(game_event):
+    """Record the victim and the attacker."""
+    if trace_recorder.recording:
+        trace_recorder.record(TRACE_PLAYER_DEATH, game_event['userid'], game_event['attacker'])
+
+
+@Event('weapon_fire')
+def on_weapon_fire(game_event):
+    """Record the player and the weapon fired."""
+    if trace_recorder.recording:
+        trace_recorder.record(
+            TRACE_WEAPON_FIRE, game_event['userid'], trace_recorder.get_string_id(game_event['weapon'])
+        )
+
+
+# =============================================================================
+# >> ENTITY HOOKS
+# =============================================================================
+@EntityPreHook(EntityCondition.is_bot_player, 'bump_weapon')
+@EntityPreHook(EntityCondition.is_human_player, 'bump_weapon')
+def on_pre_bump_weapon(stack_data):
+    """Record the player and the weapon bumped into."""
+    if not trace_recorder.recording:
+        return
+
+    player = make_object(Player, stack_data[0])
+    weapon = make_object(Weapon, stack_data[1])
+    trace_recorder.record(
+        TRACE_BUMP_WEAPON, player.index, weapon.index, trace_recorder.get_string_id(weapon.classname)
+    )
+
+
+@EntityPreHook(EntityCondition.is_bot_player, 'drop_weapon')
+@EntityPreHook(EntityCondition.is_human_player, 'drop_weapon')
+def on_pre_drop_weapon(stack_data):
+    """Record the player and their active weapon."""
+    if not trace_recorder.recording:
+        return
+
+    player = make_object(Player, stack_data[0])
+    active_weapon = player.get_active_weapon()
+
+    if active_weapon is None:
+        trace_recorder.record(TRACE_DROP_WEAPON, player.index, 0, 0)
+    else:
+        trace_recorder.record(
+            TRACE_DROP_WEAPON, player.index, active_weapon.index, trace_recorder.get_string_id(active_weapon.classname)
+        )
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnClientActive
+def on_client_active(index):
+    """Record the player who is in the game now."""
+    if not trace_recorder.recording:
+        return
+
+    with suppress(ValueError):
+        trace_recorder.record(TRACE_PLAYER_ACTIVE, index, player_cache.from_index(index).userid)
+
+
+@OnClientDisconnect
+def on_client_disconnect(index):
+    """Record the disconnecting player."""
+    if trace_recorder.recording:
+        trace_recorder.record(TRACE_PLAYER_DISCONNECT, index)
+
+
+@OnEntitySpawned
+def on_entity_spawned(base_entity):
+    """Record the spawned entity."""
+    if not trace_recorder.recording:
+        return
+
+    with suppress(ValueError):
+        trace_recorder.record(
+            TRACE_ENTITY_SPAWNED, base_entity.index, trace_recorder.get_string_id(base_entity.classname)
+        )
+
+
+@OnEntityDeleted
+def on_entity_deleted(base_entity):
+    """Record the deleted entity."""
+    if not trace_recorder.recording:
+        return
+
+    with suppress(ValueError):
+        trace_recorder.record(TRACE_ENTITY_DELETED, base_entity.index)
+
+
+@OnLevelInit
+def on_level_init(map_name):
+    """Record the map change."""
+    if trace_recorder.recording:
+        trace_recorder.record(TRACE_LEVEL_INIT, trace_recorder.get_string_id(map_name))
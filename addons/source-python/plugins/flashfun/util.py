@@ -8,22 +8,21 @@
 # Python Imports
 #   Contextlib
 from contextlib import suppress
+#   Functools
+from functools import partial
 
 # Source.Python Imports
 #   Colors
 from colors import RED
 from colors import WHITE
-#   Listeners
-from listeners.tick import GameThread
 #   Messages
 from messages import SayText2
-#   Players
-from players.entity import Player
-#   Rewards
-from flashfun.rewards import player_rewards_list
+#   Engines
+from engines.server import global_vars
+#   Hooks
+from hooks.exceptions import except_hooks
 #   Weapons
 from weapons.entity import Weapon
-from weapons.manager import weapon_manager
 
 # Plugin Imports
 #   Config
@@ -33,90 +32,202 @@ from flashfun.config import cvar_spawn_protection_time
 #   Colors
 from flashfun.colors import MESSAGE_COLOR_ORANGE
 from flashfun.colors import MESSAGE_COLOR_WHITE
+#   Flashbangs
+from flashfun.flashbangs import flashbang_equipper
 #   Info
 from flashfun.info import info
+#   Player Cache
+from flashfun.player_cache import player_cache
 #   Rewards
-from flashfun.rewards import player_rewards_list
-from flashfun.rewards import weapon_rewards
+from flashfun.rewards import pending_rewards
+from flashfun.rewards import reward_rules
+#   Scheduler
+from flashfun.scheduler import scheduler
 #   Spawn Locations
-from flashfun.spawn_locations import SpawnLocationDispatcher
+from flashfun.spawn_locations import spawn_location_dispatcher
+#   Streaks
+from flashfun.streaks import streak_tracker
 
 
 # =============================================================================
-# >> UTILITY FUNCTIONS
+# >> CLASSES
 # =============================================================================
-def enable_damage_protection(player):
-    """Enable spawn protection for the player."""
-    player.godmode = True
-    player.color = RED
+class _AttackerRewards(object):
+    """Class used to collect the rewards an attacker earns with the kills of one tick.
 
+        * attribute rewards are added up and clamped, so they can be set once
+        * each weapon reward is only given once
+    """
 
-def disable_damage_protection(player_index):
-    """Disable spawn protection for the player."""
-    with suppress(ValueError):
-        player = Player(player_index)
+    def __init__(self, player):
+        """Object initialization."""
+        self.player = player
 
-        player.godmode = False
-        player.color = WHITE
+        # Store the player's attribute values as they would be after each kill, and other player properties read once
+        self._values = {
+            reward.attribute: getattr(player, reward.attribute) for reward in reward_rules.attribute_rewards
+        }
 
+        # Store the classnames of the weapon rewards in the order they have been earned
+        self._classnames = dict()
 
-def handle_player_reward(player, attr, gain, max_value):
-    """Handle a player reward."""
-    # Fix the maximum value if it is zero
-    if max_value == 0:
-        max_value = 999
+        # Look up the reward triggers in the streak tracker and the values above
+        self._get_trigger_value = partial(streak_tracker.get_trigger_value, values=self._values)
 
-    # Calculate the new value for the reward attribute
-    new_value = getattr(player, attr) + gain
+    def add_kill(self):
+        """Add the rewards for a kill the streak tracker has already counted."""
+        values = self._values
 
-    # If it exceeds the maximum value, set the maximum value as the new value
-    if new_value > max_value:
-        new_value = max_value
+        # Add the attribute rewards, as if they were set after each kill
+        for reward in reward_rules.attribute_rewards:
+            values[reward.attribute] = min(values[reward.attribute] + reward.gain, reward.max_value)
 
-    # Set the new reward attribute value
-    setattr(player, attr, new_value)
+        # Add the weapon rewards the player has reached the multiplier for with this kill
+        for reward in reward_rules.get_weapon_rewards(self.player, self._get_trigger_value):
+            self._classnames[reward.classname] = None
 
+    def apply(self):
+        """Set the player's attributes and give the player the weapon rewards."""
+        player = self.player
 
-def handle_weapon_reward(player, reward_type, reward_multiplier, basename):
-    """Handle weapon rewards."""
-    # Get the player's property value for the reward type
-    reward_type_value = getattr(player, reward_type)
+        for reward in reward_rules.attribute_rewards:
+            setattr(player, reward.attribute, self._values[reward.attribute])
 
-    # Only respect values higher than zero
-    if reward_type_value > 0:
+        for classname in self._classnames:
+            pending_rewards.add(player.userid, classname)
+            equip_player(player, classname)
 
-        # If the player has reached the multiplier, handle the reward
-        if reward_type_value % reward_multiplier == 0:
-            classname = weapon_manager[basename].name
 
-            player_rewards_list.append((player.userid, classname))
-            equip_player(player, classname)
+class _DeathQueue(object):
+    """Class used to process all deaths of a tick at once.
+
+        * deaths are processed in order, so streaks end up the same as when processing each death on its own
+        * rewards are collected per attacker and applied once
+        * errors only drop the rewards of the attacker they happen for, the other deaths are still processed
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store the deaths of the current tick: [(victim index, attacker index or None, curtime)]
+        self._deaths = list()
+
+    def __len__(self):
+        """Return the number of queued deaths."""
+        return len(self._deaths)
+
+    def add(self, victim_index, attacker_index=None):
+        """Queue a death, with the attacker's index if they have killed an enemy."""
+        self._deaths.append((victim_index, attacker_index, global_vars.curtime))
+
+    def process(self):
+        """Update the streaks and apply the rewards of all queued deaths."""
+        if not self._deaths:
+            return
+
+        deaths, self._deaths = self._deaths, list()
+        attackers = dict()
+
+        for victim_index, attacker_index, curtime in deaths:
+            streak_tracker.on_death(victim_index)
+
+            if attacker_index is None:
+                continue
+
+            streak_tracker.on_kill(attacker_index, curtime)
+
+            # Get the rewards the attacker has collected this tick (None if they have left or their rewards failed)
+            if attacker_index not in attackers:
+                try:
+                    attackers[attacker_index] = _AttackerRewards(player_cache.from_index(attacker_index))
+                except ValueError:
+                    attackers[attacker_index] = None
+                except Exception:
+                    except_hooks.print_exception()
+                    attackers[attacker_index] = None
+
+            attacker_rewards = attackers[attacker_index]
+
+            if attacker_rewards is None:
+                continue
+
+            # Drop only this attacker's rewards if adding them fails, the other deaths have already been dequeued
+            try:
+                attacker_rewards.add_kill()
+            except Exception:
+                except_hooks.print_exception()
+                attackers[attacker_index] = None
+
+        for attacker_rewards in attackers.values():
+            if attacker_rewards is None:
+                continue
+
+            try:
+                attacker_rewards.apply()
+            except ValueError:
+                continue
+            except Exception:
+                except_hooks.print_exception()
+
+    def clear(self):
+        """Drop all queued deaths."""
+        self._deaths.clear()
 
 
-def handle_weapon_reward_properties(weapon):
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+death_queue = _DeathQueue()
+
+
+# =============================================================================
+# >> UTILITY FUNCTIONS
+# =============================================================================
+def enable_damage_protection(player):
+    """Enable spawn protection for the player."""
+    player.godmode = True
+    player.color = RED
+
+
+def disable_damage_protection(player_index):
+    """Disable spawn protection for the player."""
+    with suppress(ValueError):
+        player = player_cache.from_index(player_index)
+
+        player.godmode = False
+        player.color = WHITE
+
+
+def handle_weapon_reward_properties(weapon_index):
     """Handle weapon reward properties."""
-    with suppress(AttributeError):
+    with suppress(AttributeError, ValueError):
+
+        # Get a Weapon object for the weapon
+        weapon = Weapon(weapon_index)
 
         # Get a Player object fort the player
-        player = Player(weapon.owner.index)
+        player = player_cache.from_index(weapon.owner.index)
 
         # Ignore handling if the reward properties have already been prepared
-        if (player.userid, weapon.classname) not in player_rewards_list:
+        if (player.userid, weapon.classname) not in pending_rewards:
             return
 
-        # Get the reward values
-        reward_values = weapon_rewards[weapon_manager[weapon.classname].basename]
+        # Get the reward
+        reward = reward_rules.get_weapon_reward(weapon.classname)
 
         # Set the weapon properties
-        with suppress(ValueError):
-            weapon.clip = int(reward_values.get('clip', weapon.clip))
-            weapon.ammo = int(reward_values.get('ammo', weapon.ammo))
+        if reward is not None:
+            with suppress(ValueError):
+                if reward.clip is not None:
+                    weapon.clip = reward.clip
+
+                if reward.ammo is not None:
+                    weapon.ammo = reward.ammo
 
-        # Remove the player from the player rewards list
-        player_rewards_list.remove((player.userid, weapon.classname))
+        # Remove the reward from the pending rewards
+        pending_rewards.discard(player.userid, weapon.classname)
 
 
-def equip_player(player, classname='weapon_flashbang'):
+def equip_player(player, classname):
     """Equip the player with a weapon, if they don't already own one."""
     if player.get_weapon(classname) is None:
         player.give_named_item(classname)
@@ -124,31 +235,36 @@ def equip_player(player, classname='weapon_flashbang'):
 
 def prepare_player(player):
     """Prepare the player."""
-    # Perform setting the player's spawn location on another thread
-    spawn_location_dispatch_thread = GameThread(target=SpawnLocationDispatcher.perform_action, args=(player,))
-    spawn_location_dispatch_thread.start()
+    # Move the player to a spawn location along with all other players spawning this tick
+    spawn_location_dispatcher.request(player)
 
     # Set health and armor spawn values
     player.health = int(cvar_health_spawn)
     player.armor = int(cvar_armor_spawn)
 
     # Equip the player
-    equip_player(player)
+    flashbang_equipper.on_spawn(player)
 
     # Enable spawn protection
     enable_damage_protection(player)
 
     # Disable spawn protection later
-    player.delay(abs(int(cvar_spawn_protection_time)), disable_damage_protection, (player.index,))
+    scheduler.schedule(
+        abs(int(cvar_spawn_protection_time)), disable_damage_protection, (player.index,),
+        key=(player.index, 'spawn_protection')
+    )
+
+
+def respawn_player(player_index):
+    """Respawn the player if they are still valid."""
+    with suppress(ValueError):
+        player_cache.from_index(player_index).spawn(True)
 
 
 def remove_weapon(weapon_index):
     """Remove a weapon entity from the server if it is still valid."""
     with suppress(ValueError):
-        weapon = Weapon(weapon_index)
-
-        if weapon.owner is None:
-            weapon.remove()
+        Weapon(weapon_index).remove()
 
 
 def tell_player(player, message):
@@ -0,0 +1,154 @@
+# ../flashfun/weapon_sweeper.py
+
+"""Provides removal of weapons nobody owns."""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Collections
+from collections import deque
+#   Contextlib
+from contextlib import suppress
+
+# Source.Python Imports
+#   Engines
+from engines.server import global_vars
+#   Listeners
+from listeners import OnEntityDeleted
+from listeners import OnLevelEnd
+from listeners import OnTick
+#   Weapons
+from weapons.entity import Weapon
+
+# Plugin Imports
+#   Config
+from flashfun.config import cvar_max_world_weapons
+#   Stats
+from flashfun.stats import hook_stats
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Time after which a weapon nobody owns is removed (in seconds)
+WEAPON_REMOVAL_DELAY = 2.0
+
+# Interval in which weapons are swept (in seconds)
+WEAPON_SWEEP_INTERVAL = 0.5
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _WeaponSweeper(object):
+    """Class used to remove weapons nobody owns in batches.
+
+        * weapons are queued in the order they have been dropped or blocked, with their removal time
+        * one sweep removes all weapons whose removal time has passed, if nobody has picked them up meanwhile
+        * if more weapons than `flashfun_max_world_weapons` are queued, the oldest ones are removed right away
+    """
+
+    def __init__(self):
+        """Object initialization."""
+        # Store (weapon index, removal time) in the order the weapons have been queued
+        self._queue = deque()
+
+        # Store the removal time of each queued weapon index
+        self._removal_times = dict()
+
+        # Store the time of the next sweep
+        self._next_sweep = 0.0
+
+        # Store the number of weapons removed
+        self.removed = 0
+
+    def __len__(self):
+        """Return the number of queued weapons."""
+        return len(self._removal_times)
+
+    def add(self, weapon_index):
+        """Queue a weapon for removal, unless it is already queued."""
+        if weapon_index in self._removal_times:
+            return
+
+        removal_time = global_vars.curtime + WEAPON_REMOVAL_DELAY
+        self._removal_times[weapon_index] = removal_time
+        self._queue.append((weapon_index, removal_time))
+
+        # Remove the oldest weapons early, if there are too many
+        max_world_weapons = int(cvar_max_world_weapons)
+
+        if max_world_weapons > 0:
+            while len(self._removal_times) > max_world_weapons:
+                self._remove_next()
+
+    def discard(self, weapon_index):
+        """Stop tracking a weapon (i.e. because it has been deleted)."""
+        self._removal_times.pop(weapon_index, None)
+
+    def sweep(self):
+        """Remove all weapons whose removal time has passed."""
+        now = global_vars.curtime
+
+        if now < self._next_sweep:
+            return
+
+        self._next_sweep = now + WEAPON_SWEEP_INTERVAL
+
+        while self._queue and self._queue[0][1] <= now:
+            self._remove_next()
+
+    def clear(self):
+        """Stop tracking all weapons."""
+        self._queue.clear()
+        self._removal_times.clear()
+        self._next_sweep = 0.0
+
+    def _remove_next(self):
+        """Remove the weapon queued first, if it is still queued and nobody owns it."""
+        weapon_index, removal_time = self._queue.popleft()
+
+        # Skip entries of weapons which have been deleted (and whose index might have been reused)
+        if self._removal_times.get(weapon_index) != removal_time:
+            return
+
+        del self._removal_times[weapon_index]
+
+        with suppress(ValueError):
+            weapon = Weapon(weapon_index)
+
+            if weapon.owner is None:
+                weapon.remove()
+                self.removed += 1
+
+
+# =============================================================================
+# >> PUBLIC GLOBAL VARIABLES
+# =============================================================================
+weapon_sweeper = _WeaponSweeper()
+
+
+# =============================================================================
+# >> LISTENERS
+# =============================================================================
+@OnTick
+@hook_stats.measure
+def on_tick():
+    """Remove the weapons whose removal time has passed."""
+    weapon_sweeper.sweep()
+
+
+@OnEntityDeleted
+@hook_stats.measure
+def on_entity_deleted(base_entity):
+    """Stop tracking deleted weapons."""
+    with suppress(ValueError):
+        weapon_sweeper.discard(base_entity.index)
+
+
+@OnLevelEnd
+@hook_stats.measure
+def on_level_end():
+    """Stop tracking all weapons, since all entities are going to be removed."""
+    weapon_sweeper.clear()
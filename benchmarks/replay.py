@@ -0,0 +1,385 @@
+"""Replays a recorded game event trace through the plugin's handlers and reports the plugin's CPU time per tick.
+
+Traces are recorded on a game server with `flashfun_trace start` and `flashfun_trace stop`. The replay uses the
+Source.Python stand-ins in `benchmarks/stubs` and a temporary copy of the plugin data files. Run this from the
+repository root:
+
+    python benchmarks/replay.py TRACE_FILE [--speed SPEED] [--output report.json]
+
+Entities the plugin creates itself (i.e. the weapons it gives to players) are created again by the replayed handlers,
+and players stand where the stand-ins put them, since positions are not recorded. The work of the plugin's background
+threads is done within the tick that starts it, so it is measured and its results don't depend on thread timing.
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Argparse
+from argparse import ArgumentParser
+#   Collections
+from collections import Counter
+#   Itertools
+from itertools import groupby
+#   JSON
+import json
+#   Shutil
+import shutil
+#   Statistics
+from statistics import median
+#   Sys
+import sys
+#   Time
+from time import perf_counter
+from time import sleep
+from time import process_time
+
+# Script Imports
+#   Run
+from run import prepare_environment
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+# Number of slowest ticks to report
+SLOWEST_TICKS = 10
+
+
+# =============================================================================
+# >> CLASSES
+# =============================================================================
+class _Replay(object):
+    """Class used to feed trace records to the plugin's handlers, tick by tick."""
+
+    def __init__(self, interval_per_tick, speed):
+        """Object initialization."""
+        # Import the plugin only now, since it needs the stand-ins and the copied data files
+        from engines.server import global_vars
+        from entities.entity import Entity
+        from entities.hooks import EntityPreHook
+        from events import Event
+        from listeners import OnClientActive
+        from listeners import OnClientDisconnect
+        from listeners import OnEntityDeleted
+        from listeners import OnEntitySpawned
+        from listeners import OnLevelEnd
+        from listeners import OnLevelInit
+        from listeners import OnTick
+        from listeners.tick import Delay
+        from players.entity import Player
+        from weapons.entity import Weapon
+
+        import flashfun.flashfun
+        from flashfun import trace
+        from flashfun.spawn_locations import spawn_location_dispatcher
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        self.global_vars = global_vars
+        self.entity_class = Entity
+        self.player_class = Player
+        self.weapon_class = Weapon
+        self.call_hook = EntityPreHook.call
+        self.fire_event = Event.fire
+        self.on_client_active = OnClientActive.manager_notify
+        self.on_client_disconnect = OnClientDisconnect.manager_notify
+        self.on_entity_deleted = OnEntityDeleted.manager_notify
+        self.on_entity_spawned = OnEntitySpawned.manager_notify
+        self.on_level_end = OnLevelEnd.manager_notify
+        self.on_level_init = OnLevelInit.manager_notify
+        self.on_tick = OnTick.manager_notify
+        self.run_delays = Delay.run_due
+        self.spawn_location_dispatcher = spawn_location_dispatcher
+        self.spawn_locations_manager = spawn_locations_manager
+
+        # Assign spawn locations on this thread instead of the dispatcher's worker thread
+        spawn_location_dispatcher._start = lambda: None
+
+        global_vars.interval_per_tick = interval_per_tick
+        self.speed = speed
+
+        # Store the stand-in entities by their recorded index
+        self._entities = dict()
+
+        # Store the handler of each record type
+        self._handlers = {
+            trace.TRACE_LEVEL_INIT: self._level_init,
+            trace.TRACE_PLAYER_ACTIVE: self._player_active,
+            trace.TRACE_PLAYER_DISCONNECT: self._player_disconnect,
+            trace.TRACE_PLAYER_SPAWN: self._player_spawn,
+            trace.TRACE_PLAYER_DEATH: self._player_death,
+            trace.TRACE_WEAPON_FIRE: self._weapon_fire,
+            trace.TRACE_BUMP_WEAPON: self._bump_weapon,
+            trace.TRACE_DROP_WEAPON: self._drop_weapon,
+            trace.TRACE_ENTITY_SPAWNED: self._entity_spawned,
+            trace.TRACE_ENTITY_DELETED: self._entity_deleted,
+        }
+
+        # Store the CPU time and number of records of each replayed tick: [(tick, CPU time, records)]
+        self.ticks = list()
+        self.record_counts = Counter()
+        self.levels = 0
+
+    def run(self, records):
+        """Replay all records, running every tick between the first and the last one."""
+        global_vars = self.global_vars
+        interval = global_vars.interval_per_tick
+        started = None
+
+        for tick, tick_records in groupby(records, key=lambda record: record[1]):
+            tick_records = list(tick_records)
+
+            if started is None:
+                started = perf_counter()
+                global_vars.tick_count = tick - 1
+
+            # Follow the server time backwards on map changes, and run the ticks without records in between
+            if tick <= global_vars.tick_count:
+                global_vars.tick_count = tick - 1
+
+            while global_vars.tick_count < tick - 1:
+                self._run_tick(global_vars.tick_count + 1, ())
+                self._wait(started, interval)
+
+            self._run_tick(tick, tick_records)
+            self._wait(started, interval)
+
+    def _run_tick(self, tick, records):
+        """Feed the tick's records to the plugin and run the tick listeners, measuring the CPU time of all threads."""
+        self.global_vars.tick_count = tick
+        start = process_time()
+
+        for record_type, _, values in records:
+            self._handlers[record_type](*values)
+
+        self.on_tick()
+        self.run_delays()
+        self._run_background_work()
+
+        self.ticks.append((tick, process_time() - start, len(records)))
+        self.record_counts.update(record_type for record_type, _, _ in records)
+
+    def _run_background_work(self):
+        """Finish the work the tick has handed to background threads, so the next tick applies its results."""
+        # Wait for the distances between spawn locations, if the scored mode has started calculating them
+        thread = self.spawn_locations_manager._distance_matrix_build[1]
+
+        if thread is not None:
+            thread.join()
+
+        # Assign spawn locations to the jobs submitted this tick, up to the stop signal put behind them
+        dispatcher = self.spawn_location_dispatcher
+
+        if not dispatcher._jobs.empty():
+            dispatcher._jobs.put(None)
+            dispatcher._work(dispatcher._jobs, dispatcher._results)
+
+    def _wait(self, started, interval):
+        """Wait for the wall time of the next tick, at the replay speed."""
+        if not self.speed:
+            return
+
+        delay = started + len(self.ticks) * interval / self.speed - perf_counter()
+
+        if delay > 0:
+            sleep(delay)
+
+    def _level_init(self, map_name):
+        """Change the map."""
+        if self.levels:
+            self.on_level_end()
+
+        self.levels += 1
+        self.global_vars.map_name = map_name
+        self.on_level_init(map_name)
+
+    def _player_active(self, index, userid):
+        """Connect a stand-in player."""
+        if index in self.player_class.players:
+            self._player_disconnect(index)
+
+        self.player_class.create(index, userid)
+        self.on_client_active(index)
+
+    def _player_disconnect(self, index):
+        """Disconnect the stand-in player."""
+        if index not in self.player_class.players:
+            return
+
+        self.on_client_disconnect(index)
+        self.player_class.destroy(index)
+
+    def _player_spawn(self, userid, team):
+        """Spawn the player on their team."""
+        player = self._get_player(userid)
+
+        if player is None:
+            return
+
+        player.team = team
+        player.dead = False
+        self.fire_event('player_spawn', userid=userid)
+
+    def _player_death(self, userid, attacker):
+        """Kill the player, who loses all their weapons."""
+        player = self._get_player(userid)
+
+        if player is None:
+            return
+
+        player.dead = True
+        player.active_weapon = None
+        player._weapons.clear()
+        self.fire_event('player_death', userid=userid, attacker=attacker)
+
+    def _weapon_fire(self, userid, weapon_name):
+        """Fire the player's weapon, which is gone afterwards if it is a grenade."""
+        player = self._get_player(userid)
+
+        if player is None:
+            return
+
+        self.fire_event('weapon_fire', userid=userid, weapon=weapon_name)
+
+        if weapon_name.endswith(('flashbang', 'hegrenade')):
+            player._weapons.pop(weapon_name if weapon_name.startswith('weapon_') else f'weapon_{weapon_name}', None)
+
+    def _bump_weapon(self, player_index, weapon_index, classname):
+        """Bump the player into the weapon, who picks it up unless the hooks block it, like the game announces."""
+        player = self.player_class.players.get(player_index)
+
+        if player is None:
+            return
+
+        weapon = self._get_weapon(weapon_index, classname)
+
+        if self.call_hook('bump_weapon', (player, weapon)) is False:
+            return
+
+        weapon.owner = player
+        player._weapons.setdefault(classname, weapon)
+        self.fire_event('item_pickup', userid=player.userid, item=classname[len('weapon_'):])
+
+    def _drop_weapon(self, player_index, weapon_index, classname):
+        """Drop the player's active weapon."""
+        player = self.player_class.players.get(player_index)
+
+        if player is None:
+            return
+
+        weapon = None if classname is None else self._get_weapon(weapon_index, classname)
+        player.active_weapon = weapon
+        self.call_hook('drop_weapon', (player,))
+        player.active_weapon = None
+
+        if weapon is not None:
+            weapon.owner = None
+            player._weapons.pop(classname, None)
+
+    def _entity_spawned(self, index, classname):
+        """Create a stand-in entity and notify the plugin."""
+        self._entity_deleted(index)
+
+        if classname.startswith('weapon_'):
+            entity = self._entities[index] = self.weapon_class.create(classname)
+        else:
+            entity = self._entities[index] = self.entity_class.create(classname)
+
+        self.on_entity_spawned(entity)
+
+    def _entity_deleted(self, index):
+        """Notify the plugin and delete the stand-in entity."""
+        entity = self._entities.pop(index, None)
+
+        if entity is not None:
+            self.on_entity_deleted(entity)
+            entity.remove()
+
+    def _get_player(self, userid):
+        """Return the stand-in player with the userid, or None if they are not connected."""
+        try:
+            return self.player_class.from_userid(userid)
+        except ValueError:
+            return None
+
+    def _get_weapon(self, index, classname):
+        """Return the stand-in weapon with the recorded index, creating it if it doesn't exist."""
+        weapon = self._entities.get(index)
+
+        if weapon is None or weapon.classname != classname or not weapon.is_valid:
+            weapon = self._entities[index] = self.weapon_class.create(classname)
+
+        return weapon
+
+    def get_report(self):
+        """Return the replay report, with CPU times in microseconds."""
+        times = sorted(cpu_time * 1e6 for _, cpu_time, _ in self.ticks)
+        slowest_ticks = sorted(self.ticks, key=lambda item: item[1], reverse=True)[:SLOWEST_TICKS]
+        record_names = {record_type: handler.__name__[1:] for record_type, handler in self._handlers.items()}
+
+        return {
+            'ticks': len(self.ticks),
+            'records': {record_names[record_type]: count for record_type, count in sorted(self.record_counts.items())},
+            'cpu_total_us': sum(times),
+            'cpu_per_tick_us': {
+                'median': median(times) if times else 0.0,
+                'p99': times[int(len(times) * 0.99)] if times else 0.0,
+                'max': times[-1] if times else 0.0,
+            },
+            'slowest_ticks': [
+                {'tick': tick, 'cpu_us': cpu_time * 1e6, 'records': records}
+                for tick, cpu_time, records in slowest_ticks
+            ],
+        }
+
+
+# =============================================================================
+# >> MAIN
+# =============================================================================
+def main(args=None):
+    """Replay the trace file and write the report."""
+    parser = ArgumentParser(prog='python benchmarks/replay.py', description=__doc__.splitlines()[0])
+    parser.add_argument('trace', help='trace file recorded with flashfun_trace')
+    parser.add_argument(
+        '--speed', type=float, default=0.0,
+        help='replay speed relative to the recorded tick rate, e.g. 1 for real time (default: 0, as fast as possible)'
+    )
+    parser.add_argument('--output', help='write the report to this JSON file (default: standard output)')
+    options = parser.parse_args(args)
+
+    data_path = prepare_environment()
+
+    try:
+        from flashfun.trace import read_trace
+
+        interval_per_tick, records = read_trace(options.trace)
+        replay = _Replay(interval_per_tick, options.speed)
+
+        started = perf_counter()
+        replay.run(records)
+        wall_time = perf_counter() - started
+    finally:
+        shutil.rmtree(data_path, ignore_errors=True)
+
+    report = replay.get_report()
+    report['wall_time_s'] = wall_time
+
+    cpu = report['cpu_per_tick_us']
+    print(
+        f'Replayed {report["ticks"]} ticks in {wall_time:.2f} s: {report["cpu_total_us"] / 1e6:.3f} s plugin CPU time,'
+        f' {cpu["median"]:.1f} us median, {cpu["p99"]:.1f} us p99, {cpu["max"]:.1f} us max per tick',
+        file=sys.stderr
+    )
+
+    if options.output is None:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    else:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""Runs microbenchmarks of the plugin's hot paths without a game server.
+
+Source.Python is replaced by the stand-ins in `benchmarks/stubs`, and the plugin data files are copied to a temporary
+directory first, so the benchmarks never change the real data files. Run this from the repository root:
+
+    python benchmarks/run.py [--quick] [--output results.json] [--compare baseline.json]
+
+The results are written as JSON. With `--compare`, benchmarks which have become slower than the baseline by more than
+the threshold are listed and the exit status is 1.
+"""
+
+# =============================================================================
+# >> IMPORTS
+# =============================================================================
+# Python Imports
+#   Argparse
+from argparse import ArgumentParser
+#   JSON
+import json
+#   OS
+import os
+#   Platform
+import platform
+#   Random
+import random
+#   Shutil
+import shutil
+#   Statistics
+from statistics import mean
+from statistics import median
+#   Sys
+import sys
+#   Tempfile
+import tempfile
+#   Time
+from time import perf_counter
+
+
+# =============================================================================
+# >> CONSTANTS
+# =============================================================================
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_PATH = os.path.dirname(BENCHMARKS_PATH)
+STUBS_PATH = os.path.join(BENCHMARKS_PATH, 'stubs')
+PLUGINS_PATH = os.path.join(REPOSITORY_PATH, 'addons', 'source-python', 'plugins')
+DATA_PATH = os.path.join(REPOSITORY_PATH, 'addons', 'source-python', 'data', 'plugins')
+
+# Real map the spawn locations are taken from, and the spawn location counts to benchmark
+#   counts above the map's own count tile copies of its spawn locations side by side
+SPAWN_LOCATIONS_MAP = 'de_dust2'
+SPAWN_LOCATION_COUNTS = (30, 250, 2000)
+
+PLAYER_COUNTS = (16, 32, 64)
+
+# Spawn location selection modes, and the numbers of players spawning in the same tick
+SPAWN_LOCATION_MODES = ('random', 'scored')
+SPAWNING_PLAYER_COUNTS = (1, 8)
+
+BENCHMARK_NAMES = (
+    'find_spawn_location', 'player_death', 'bump_weapon', 'spawn_locations_load', 'spawn_locations_save'
+)
+
+# Minimum number of runs and minimum time spent per benchmark (in seconds)
+MIN_RUNS = 5
+MIN_TIME = 0.5
+QUICK_MIN_TIME = 0.05
+
+# Factor by which a benchmark's median time has to grow to count as a regression
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+
+# =============================================================================
+# >> ENVIRONMENT
+# =============================================================================
+def prepare_environment():
+    """Copy the plugin data files to a temporary directory and put the stand-ins on the module search path."""
+    data_path = tempfile.mkdtemp(prefix='flashfun-benchmarks-')
+    shutil.copytree(os.path.join(DATA_PATH, 'flashfun'), os.path.join(data_path, 'flashfun'))
+
+    os.environ['FLASHFUN_DATA_PATH'] = data_path
+    sys.path[:0] = [STUBS_PATH, PLUGINS_PATH]
+
+    return data_path
+
+
+def write_tiled_map(spawn_locations_path, map_name, count):
+    """Write a map with `count` spawn locations tiled from the real map's ones, and return its name."""
+    with open(os.path.join(spawn_locations_path, f'{SPAWN_LOCATIONS_MAP}.json')) as f:
+        spawn_locations = json.load(f)
+
+    if count <= len(spawn_locations):
+        tiled = spawn_locations[:count]
+    else:
+        xs = [spawn_location['vector'][0] for spawn_location in spawn_locations]
+        ys = [spawn_location['vector'][1] for spawn_location in spawn_locations]
+        width, depth = max(xs) - min(xs) + 1000, max(ys) - min(ys) + 1000
+        columns = int((count / len(spawn_locations)) ** 0.5) + 1
+
+        tiled = list()
+
+        for tile in range(count // len(spawn_locations) + 1):
+            offset_x, offset_y = (tile % columns) * width, (tile // columns) * depth
+
+            for spawn_location in spawn_locations:
+                x, y, z = spawn_location['vector']
+                tiled.append({'vector': [x + offset_x, y + offset_y, z], 'angle': spawn_location['angle']})
+
+        tiled = tiled[:count]
+
+    with open(os.path.join(spawn_locations_path, f'{map_name}.json'), 'w') as f:
+        json.dump(tiled, f, indent=4)
+
+    return map_name
+
+
+# =============================================================================
+# >> MEASURING
+# =============================================================================
+def measure(function, min_time, setup=None):
+    """Call `function` at least `MIN_RUNS` times and for at least `min_time` seconds, and return the timings."""
+    timings = list()
+    deadline = perf_counter() + min_time
+
+    while len(timings) < MIN_RUNS or perf_counter() < deadline:
+        if setup is not None:
+            setup()
+
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+
+    return timings
+
+
+def get_result(name, params, timings, operations=1):
+    """Return the result of a benchmark, with times per operation in microseconds."""
+    timings = [timing / operations * 1e6 for timing in timings]
+
+    return {
+        'name': name,
+        'params': params,
+        'runs': len(timings),
+        'operations': operations,
+        'min_us': min(timings),
+        'median_us': median(timings),
+        'mean_us': mean(timings),
+        'max_us': max(timings),
+    }
+
+
+def get_key(result):
+    """Return the key identifying a benchmark result across runs."""
+    return result['name'], tuple(sorted(result['params'].items()))
+
+
+# =============================================================================
+# >> BENCHMARKS
+# =============================================================================
+class _Benchmarks(object):
+    """Class used to drive the plugin's hot paths in the stand-in environment."""
+
+    def __init__(self, data_path, min_time):
+        """Object initialization."""
+        # Import the plugin only now, since it needs the stand-ins and the copied data files
+        from engines.server import global_vars
+        from listeners import OnClientActive
+        from listeners import OnClientDisconnect
+        from listeners import OnLevelInit
+        from players.entity import Player
+
+        import flashfun.flashfun as flashfun
+
+        self.global_vars = global_vars
+        self.on_client_active = OnClientActive.manager_notify
+        self.on_client_disconnect = OnClientDisconnect.manager_notify
+        self.on_level_init = OnLevelInit.manager_notify
+        self.player_class = Player
+        self.flashfun = flashfun
+
+        self.min_time = min_time
+        self.spawn_locations_path = os.path.join(data_path, 'flashfun', 'spawn_locations', 'csgo')
+        self.map_names = {
+            count: write_tiled_map(self.spawn_locations_path, f'{SPAWN_LOCATIONS_MAP}_x{count}', count)
+            for count in SPAWN_LOCATION_COUNTS
+        }
+
+        self.random = random.Random(0)
+        self.results = list()
+
+    def run(self, selected=None):
+        """Run all benchmarks (or the selected ones) and return the results."""
+        for name in BENCHMARK_NAMES:
+            if selected is None or name in selected:
+                getattr(self, f'_bench_{name}')()
+
+        return self.results
+
+    def _bench_find_spawn_location(self):
+        """Find spawn locations for one or several players spawning in the same tick, with all others alive."""
+        from config.manager import ConfigManager
+        from flashfun.spawn_locations import SpawnLocation
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        backends = ['grid']
+
+        try:
+            import numpy
+        except ImportError:
+            pass
+        else:
+            backends.append('numpy')
+
+        cvars = ConfigManager.cvars
+
+        for count in SPAWN_LOCATION_COUNTS:
+            self._change_map(self.map_names[count])
+
+            for player_count in PLAYER_COUNTS:
+                players = self._create_players(player_count)
+
+                for backend in backends:
+                    cvars['flashfun_spawn_location_backend'].value = backend
+
+                    for mode in SPAWN_LOCATION_MODES:
+                        cvars['flashfun_spawn_location_mode'].value = mode
+
+                        # Measure with the distances between all spawn locations, not the random mode used until then
+                        if mode == 'scored':
+                            spawn_locations_manager.prepare_distance_matrix()
+                            self._wait_for_distance_matrix()
+
+                        for spawning_count in SPAWNING_PLAYER_COUNTS:
+                            spawning = players[:spawning_count]
+
+                            # Let the spawn locations reserved by the previous run expire, as if players spawned a
+                            #   second apart
+                            timings = measure(
+                                lambda: SpawnLocation.find_spawn_locations(spawning), self.min_time,
+                                setup=lambda: self.global_vars.advance(64)
+                            )
+                            self._add_result(
+                                'find_spawn_location',
+                                {
+                                    'spawn_locations': count, 'players': player_count, 'backend': backend,
+                                    'mode': mode, 'spawning': spawning_count
+                                },
+                                timings, spawning_count
+                            )
+
+        cvars['flashfun_spawn_location_backend'].value = 'grid'
+        cvars['flashfun_spawn_location_mode'].value = 'random'
+
+    def _bench_player_death(self):
+        """Kill half of the players and process the deaths, including the attackers' streaks and rewards."""
+        from events import Event
+        from flashfun.util import death_queue
+
+        self._change_map(self.map_names[SPAWN_LOCATION_COUNTS[0]])
+
+        for player_count in PLAYER_COUNTS:
+            players = self._create_players(player_count)
+            victims = [player for player in players if player.team == 2]
+            attackers = [player for player in players if player.team == 3]
+            kills = [(victim.userid, self.random.choice(attackers).userid) for victim in victims]
+
+            def kill():
+                for victim_userid, attacker_userid in kills:
+                    Event.fire('player_death', userid=victim_userid, attacker=attacker_userid)
+
+                death_queue.process()
+
+            timings = measure(kill, self.min_time, setup=lambda: self._reset_players(players))
+            self._add_result('player_death', {'players': player_count, 'deaths': len(kills)}, timings, len(kills))
+
+    def _bench_bump_weapon(self):
+        """Bump into weapons which are kept, blocked and picked up as rewards."""
+        from flashfun.rewards import pending_rewards
+        from weapons.entity import Weapon
+
+        self._change_map(self.map_names[SPAWN_LOCATION_COUNTS[0]])
+        player = self._create_players(PLAYER_COUNTS[0])[0]
+        on_pre_bump_weapon = self.flashfun.on_pre_bump_weapon
+
+        cases = (('flashbang', 'weapon_flashbang'), ('blocked', 'weapon_ak47'), ('reward', 'weapon_glock'))
+
+        for case, classname in cases:
+            weapon = Weapon.create(classname)
+
+            if case == 'reward':
+                pending_rewards.add(player.userid, classname)
+
+            timings = measure(lambda: on_pre_bump_weapon((player, weapon)), self.min_time)
+            self._add_result('bump_weapon', {'case': case}, timings)
+
+    def _bench_spawn_locations_load(self):
+        """Load the spawn locations, from the JSON file (cold) and from the binary and distance files (warm).
+
+        In the scored mode, this includes reading or calculating the distances between all spawn locations, which
+        is done in the background.
+        """
+        from config.manager import ConfigManager
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        cvar_mode = ConfigManager.cvars['flashfun_spawn_location_mode']
+
+        for count in SPAWN_LOCATION_COUNTS:
+            self._change_map(self.map_names[count])
+
+            for mode in SPAWN_LOCATION_MODES:
+                cvar_mode.value = mode
+
+                def load():
+                    spawn_locations_manager.clear()
+                    spawn_locations_manager.load()
+                    self._wait_for_distance_matrix()
+
+                def remove_generated_files():
+                    for file in (spawn_locations_manager.binary_file, spawn_locations_manager.distance_matrix_file):
+                        file.remove_p()
+
+                self._add_result(
+                    'spawn_locations_load', {'spawn_locations': count, 'mode': mode, 'cache': 'cold'},
+                    measure(load, self.min_time, setup=remove_generated_files)
+                )
+                self._add_result(
+                    'spawn_locations_load', {'spawn_locations': count, 'mode': mode, 'cache': 'warm'},
+                    measure(load, self.min_time)
+                )
+
+        cvar_mode.value = 'random'
+
+    def _bench_spawn_locations_save(self):
+        """Write the spawn locations and their generated files, waiting for the background thread."""
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        for count in SPAWN_LOCATION_COUNTS:
+            self._change_map(self.map_names[count])
+
+            def save():
+                spawn_locations_manager.save()
+                spawn_locations_manager._compaction.join()
+
+            self._add_result('spawn_locations_save', {'spawn_locations': count}, measure(save, self.min_time))
+
+    def _add_result(self, name, params, timings, operations=1):
+        """Store and print the result of a benchmark."""
+        result = get_result(name, params, timings, operations)
+        self.results.append(result)
+
+        params = ', '.join(f'{key}={value}' for key, value in params.items())
+        print(f'{name:<24}{params:<88}{result["median_us"]:>14.2f} us', file=sys.stderr)
+
+    @staticmethod
+    def _wait_for_distance_matrix():
+        """Wait for the distances between all spawn locations to be calculated in the background, if they are."""
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        _, thread = spawn_locations_manager._distance_matrix_build
+
+        if thread is not None:
+            thread.join()
+
+    def _change_map(self, map_name):
+        """Start a new map, which loads its spawn locations."""
+        self.global_vars.map_name = map_name
+        self.on_level_init(map_name)
+
+    def _create_players(self, count):
+        """Replace all players with `count` alive players standing at random spawn locations, on alternating teams."""
+        from flashfun.spawn_locations import spawn_locations_manager
+
+        player_class = self.player_class
+
+        for index in list(player_class.players):
+            self.on_client_disconnect(index)
+            player_class.destroy(index)
+
+        origins = [spawn_locations_manager.origin(index) for index in range(len(spawn_locations_manager))]
+        players = list()
+
+        for index in range(1, count + 1):
+            x, y, z = self.random.choice(origins)
+            players.append(player_class.create(
+                index, 100 + index, team=2 + index % 2,
+                origin=(x + self.random.uniform(-300, 300), y + self.random.uniform(-300, 300), z)
+            ))
+            self.on_client_active(index)
+
+        return players
+
+    def _reset_players(self, players):
+        """Bring all players back to life with their spawn values."""
+        from flashfun.util import prepare_player
+
+        self.global_vars.advance(64)
+
+        for player in players:
+            player.dead = False
+            prepare_player(player)
+
+
+# =============================================================================
+# >> COMPARING
+# =============================================================================
+def get_regressions(results, baseline, threshold):
+    """Return (result, baseline result) of each benchmark whose median time has grown by more than `threshold`."""
+    baseline_results = {get_key(result): result for result in baseline['results']}
+    regressions = list()
+
+    for result in results:
+        baseline_result = baseline_results.get(get_key(result))
+
+        if baseline_result is not None and result['median_us'] > baseline_result['median_us'] * threshold:
+            regressions.append((result, baseline_result))
+
+    return regressions
+
+
+# =============================================================================
+# >> MAIN
+# =============================================================================
+def main(args=None):
+    """Run the benchmarks, write the results and return the exit status."""
+    parser = ArgumentParser(prog='python benchmarks/run.py', description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='benchmark',
+        help=f'benchmarks to run: {", ".join(BENCHMARK_NAMES)} (default: all)'
+    )
+    parser.add_argument('--quick', action='store_true', help='spend less time per benchmark, for smoke testing')
+    parser.add_argument('--output', help='write the results to this JSON file (default: standard output)')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare the results to a previous results file')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+        help=f'median time factor counted as a regression (default: {DEFAULT_REGRESSION_THRESHOLD})'
+    )
+    options = parser.parse_args(args)
+
+    for name in options.benchmarks:
+        if name not in BENCHMARK_NAMES:
+            parser.error(f'unknown benchmark: {name}')
+
+    data_path = prepare_environment()
+
+    try:
+        benchmarks = _Benchmarks(data_path, QUICK_MIN_TIME if options.quick else MIN_TIME)
+        results = benchmarks.run(options.benchmarks or None)
+    finally:
+        shutil.rmtree(data_path, ignore_errors=True)
+
+    report = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'quick': options.quick,
+        'results': results,
+    }
+
+    if options.output is None:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    else:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if options.compare is None:
+        return 0
+
+    with open(options.compare) as f:
+        regressions = get_regressions(results, json.load(f), options.threshold)
+
+    for result, baseline_result in regressions:
+        params = ', '.join(f'{key}={value}' for key, value in result['params'].items())
+        print(
+            f'Regression: {result["name"]} ({params}): {baseline_result["median_us"]:.2f} us'
+            f' -> {result["median_us"]:.2f} us',
+            file=sys.stderr
+        )
+
+    return int(bool(regressions))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Stand-in for Source.Python's `colors` module."""
+
+from collections import namedtuple
+
+Color = namedtuple('Color', 'r g b a')
+
+WHITE = Color(255, 255, 255, 255)
+RED = Color(255, 0, 0, 255)
+ORANGE = Color(255, 165, 0, 255)
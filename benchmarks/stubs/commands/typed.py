@@ -0,0 +1,20 @@
+"""Stand-in for Source.Python's `commands.typed` module."""
+
+
+class _TypedCommand(object):
+    callbacks = dict()
+
+    def __init__(self, commands, permission=None, **kwargs):
+        self.commands = commands
+
+    def __call__(self, callback):
+        self.callbacks[str(self.commands)] = callback
+        return callback
+
+
+class TypedSayCommand(_TypedCommand):
+    pass
+
+
+class TypedServerCommand(_TypedCommand):
+    pass
@@ -0,0 +1,53 @@
+"""Stand-in for Source.Python's `config.manager` module."""
+
+
+class ConVar(object):
+    def __init__(self, name, default, description=''):
+        self.name = name
+        self.value = default
+
+    def __int__(self):
+        return int(float(self.value))
+
+    def __float__(self):
+        return float(self.value)
+
+    def __str__(self):
+        return str(self.value)
+
+    def get_int(self):
+        return int(self)
+
+    def get_float(self):
+        return float(self)
+
+    def get_string(self):
+        return str(self)
+
+    def set_int(self, value):
+        self.value = value
+
+    set_float = set_string = set_int
+
+
+class ConfigManager(object):
+    cvars = dict()
+
+    def __init__(self, filepath, cvar_prefix=''):
+        self.cvar_prefix = cvar_prefix
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def section(self, name, separator='#'):
+        pass
+
+    def text(self, text):
+        pass
+
+    def cvar(self, name, default=0, description='', flags=0, min_value=None, max_value=None):
+        cvar = self.cvars[self.cvar_prefix + name] = ConVar(self.cvar_prefix + name, default, description)
+        return cvar
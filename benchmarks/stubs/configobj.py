@@ -0,0 +1,43 @@
+"""Stand-in for the `configobj` site-package Source.Python ships with (sections and scalars only)."""
+
+import os
+
+
+class Section(dict):
+    pass
+
+
+class ConfigObj(Section):
+    def __init__(self, infile=None, **kwargs):
+        super().__init__()
+        self.filename = infile
+
+        if infile is None:
+            return
+
+        if isinstance(infile, (list, tuple)):
+            lines = infile
+        else:
+            if not os.path.exists(infile):
+                return
+
+            with open(infile) as f:
+                lines = f.read().splitlines()
+
+        section = self
+        for line in lines:
+            line = line.strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            if line.startswith('['):
+                section = self[line.strip('[]')] = Section()
+                continue
+
+            key, _, value = line.partition('=')
+            section[key.strip()] = value.strip().strip('"').strip("'")
+
+
+class ConfigObjError(SyntaxError):
+    pass
@@ -0,0 +1,15 @@
+"""Stand-in for Source.Python's `core` module."""
+
+from enum import IntEnum
+
+GAME_NAME = 'csgo'
+SOURCE_ENGINE = 'csgo'
+
+
+class OutputReturn(IntEnum):
+    BLOCK = 0
+    CONTINUE = 1
+
+
+def echo_console(text):
+    pass
@@ -0,0 +1,18 @@
+"""Stand-in for Source.Python's `engines.server` module."""
+
+
+class _GlobalVars(object):
+    map_name = 'de_dust2'
+    tick_count = 0
+    interval_per_tick = 1 / 64
+    max_clients = 64
+
+    @property
+    def curtime(self):
+        return self.tick_count * self.interval_per_tick
+
+    def advance(self, ticks=1):
+        self.tick_count += ticks
+
+
+global_vars = _GlobalVars()
@@ -0,0 +1,48 @@
+"""Stand-in for Source.Python's `entities.entity` module."""
+
+from listeners.tick import Delay
+
+
+class BaseEntity(object):
+    entities = dict()
+    _next_index = 65
+
+    def __new__(cls, index, caching=None):
+        try:
+            return cls.entities[index]
+        except KeyError:
+            raise ValueError(f'Invalid entity index: {index}') from None
+
+    def __init__(self, index, caching=None):
+        pass
+
+    def _init_stub(self, index, classname):
+        self.index = index
+        self.classname = classname
+        self.inputs = []
+        BaseEntity.entities[index] = self
+
+    @classmethod
+    def create(cls, classname):
+        entity = object.__new__(cls)
+        index = BaseEntity._next_index
+        BaseEntity._next_index += 1
+        BaseEntity._init_stub(entity, index, classname)
+        return entity
+
+    def remove(self):
+        BaseEntity.entities.pop(self.index, None)
+
+    def call_input(self, name, *args):
+        self.inputs.append(name)
+
+    def delay(self, delay, callback, args=(), kwargs=None, cancel_on_level_end=False):
+        return Delay(delay, callback, args, kwargs, cancel_on_level_end)
+
+    @property
+    def is_valid(self):
+        return self.index in BaseEntity.entities
+
+
+class Entity(BaseEntity):
+    pass
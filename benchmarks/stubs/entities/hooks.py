@@ -0,0 +1,35 @@
+"""Stand-in for Source.Python's `entities.hooks` module."""
+
+
+class EntityCondition(object):
+    is_bot_player = 'is_bot_player'
+    is_human_player = 'is_human_player'
+
+
+class _EntityHook(object):
+    callbacks = dict()
+
+    def __init__(self, condition, function):
+        self.function = function
+
+    def __call__(self, callback):
+        self.callbacks.setdefault(self.function, []).append(callback)
+        return callback
+
+    @classmethod
+    def call(cls, function, stack_data):
+        """Call each callback of the hooked function once, like the engine would, and return the last result."""
+        result = None
+        for callback in dict.fromkeys(cls.callbacks.get(function, ())):
+            value = callback(stack_data)
+            if value is not None:
+                result = value
+        return result
+
+
+class EntityPreHook(_EntityHook):
+    pass
+
+
+class EntityPostHook(_EntityHook):
+    pass
@@ -0,0 +1,28 @@
+"""Stand-in for Source.Python's `events` package."""
+
+
+class GameEvent(dict):
+    def __init__(self, name, **variables):
+        super().__init__(variables)
+        self.name = name
+
+    def __getitem__(self, key):
+        return self.get(key, 0)
+
+
+class Event(object):
+    callbacks = dict()
+
+    def __init__(self, *event_names):
+        self.event_names = event_names
+
+    def __call__(self, callback):
+        for name in self.event_names:
+            self.callbacks.setdefault(name, []).append(callback)
+        return callback
+
+    @classmethod
+    def fire(cls, name, **variables):
+        game_event = GameEvent(name, **variables)
+        for callback in cls.callbacks.get(name, ()):
+            callback(game_event)
@@ -0,0 +1,16 @@
+"""Stand-in for Source.Python's `filters.players` module."""
+
+from players.entity import Player
+
+
+class PlayerIter(object):
+    def __init__(self, is_filters=(), not_filters=()):
+        if isinstance(is_filters, str):
+            is_filters = (is_filters, )
+        self.is_filters = is_filters
+
+    def __iter__(self):
+        for player in list(Player.players.values()):
+            if 'alive' in self.is_filters and player.dead:
+                continue
+            yield player
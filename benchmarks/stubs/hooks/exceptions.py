@@ -0,0 +1,11 @@
+"""Stand-in for Source.Python's `hooks.exceptions` module."""
+
+import traceback
+
+
+class _ExceptHooks(object):
+    def print_exception(self, *args):
+        traceback.print_exc()
+
+
+except_hooks = _ExceptHooks()
@@ -0,0 +1,36 @@
+"""Stand-in for Source.Python's `listeners` package."""
+
+
+class _Listener(object):
+    """Decorator collecting callbacks so the stand-in environment can fire them."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.callbacks.append(callback)
+
+    def __call__(self, *args):
+        return self.callback(*args)
+
+    @classmethod
+    def manager_notify(cls, *args):
+        result = None
+        for callback in list(cls.callbacks):
+            value = callback(*args)
+            if value is not None:
+                result = value
+        return result
+
+
+def _listener(name):
+    return type(name, (_Listener,), {'callbacks': []})
+
+
+OnTick = _listener('OnTick')
+OnLevelInit = _listener('OnLevelInit')
+OnLevelEnd = _listener('OnLevelEnd')
+OnClientActive = _listener('OnClientActive')
+OnClientDisconnect = _listener('OnClientDisconnect')
+OnEntitySpawned = _listener('OnEntitySpawned')
+OnEntityDeleted = _listener('OnEntityDeleted')
+OnServerOutput = _listener('OnServerOutput')
+OnPluginUnloaded = _listener('OnPluginUnloaded')
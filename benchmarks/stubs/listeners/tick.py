@@ -0,0 +1,57 @@
+"""Stand-in for Source.Python's `listeners.tick` module."""
+
+import threading
+
+from engines.server import global_vars
+
+
+class GameThread(threading.Thread):
+    pass
+
+
+class Delay(object):
+    queue = []
+
+    def __init__(self, delay, callback, args=(), kwargs=None, cancel_on_level_end=False):
+        self.exec_time = global_vars.curtime + delay
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.running = True
+        self.queue.append(self)
+
+    def cancel(self):
+        self.running = False
+
+    @classmethod
+    def run_due(cls):
+        due = [delay for delay in cls.queue if delay.exec_time <= global_vars.curtime]
+        cls.queue[:] = [delay for delay in cls.queue if delay.exec_time > global_vars.curtime and delay.running]
+        for delay in due:
+            if delay.running:
+                delay.running = False
+                delay.callback(*delay.args, **delay.kwargs)
+
+
+class Repeat(object):
+    def __init__(self, callback, args=(), kwargs=None, cancel_on_level_end=False):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs or {}
+        self._delay = None
+        self.interval = None
+
+    def start(self, interval, limit=0, execute_on_start=False):
+        self.interval = interval
+        self._schedule()
+
+    def _schedule(self):
+        self._delay = Delay(self.interval, self._execute)
+
+    def _execute(self):
+        self._schedule()
+        self.callback(*self.args, **self.kwargs)
+
+    def stop(self):
+        if self._delay is not None:
+            self._delay.cancel()
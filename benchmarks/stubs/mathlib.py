@@ -0,0 +1,29 @@
+"""Stand-in for Source.Python's `mathlib` module."""
+
+
+class Vector(object):
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.x}, {self.y}, {self.z})'
+
+    def get_distance(self, other):
+        return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2) ** 0.5
+
+    def copy(self):
+        return type(self)(self.x, self.y, self.z)
+
+
+class QAngle(Vector):
+    __slots__ = ()
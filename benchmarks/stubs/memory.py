@@ -0,0 +1,5 @@
+"""Stand-in for Source.Python's `memory` module."""
+
+
+def make_object(cls, pointer):
+    return pointer
@@ -0,0 +1,28 @@
+"""Stand-in for Source.Python's `menus` package."""
+
+
+class PagedOption(object):
+    def __init__(self, text, value=None, highlight=True, selectable=True):
+        self.text = text
+        self.value = value
+
+
+class PagedMenu(list):
+    def __init__(self, data=None, title=None, **kwargs):
+        super().__init__(data or ())
+        self.title = title
+
+    def send(self, *indexes):
+        pass
+
+    def register_build_callback(self, callback):
+        return callback
+
+    def register_select_callback(self, callback):
+        return callback
+
+    def register_close_callback(self, callback):
+        return callback
+
+    def _unload_instance(self):
+        pass
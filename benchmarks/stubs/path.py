@@ -0,0 +1,78 @@
+"""Stand-in for the `path.py` site-package Source.Python ships with."""
+
+import os
+import shutil
+
+
+class Path(str):
+    def joinpath(self, *parts):
+        return type(self)(os.path.join(self, *parts))
+
+    def abspath(self):
+        return type(self)(os.path.abspath(self))
+
+    def exists(self):
+        return os.path.exists(self)
+
+    def isfile(self):
+        return os.path.isfile(self)
+
+    def makedirs(self):
+        os.makedirs(self)
+
+    def makedirs_p(self):
+        os.makedirs(self, exist_ok=True)
+
+    def open(self, *args, **kwargs):
+        return open(self, *args, **kwargs)
+
+    def remove(self):
+        os.remove(self)
+
+    def remove_p(self):
+        if os.path.exists(self):
+            os.remove(self)
+
+    def rename(self, new):
+        os.rename(self, new)
+        return type(self)(new)
+
+    def replace(self, new):
+        os.replace(self, new)
+        return type(self)(new)
+
+    def copy(self, dst):
+        shutil.copy(self, dst)
+
+    def files(self, pattern='*'):
+        import glob
+        return [type(self)(name) for name in sorted(glob.glob(os.path.join(self, pattern)))]
+
+    def stripext(self):
+        return type(self)(os.path.splitext(self)[0])
+
+    @property
+    def mtime(self):
+        return os.path.getmtime(self)
+
+    @property
+    def size(self):
+        return os.path.getsize(self)
+
+    @property
+    def name(self):
+        return os.path.basename(self)
+
+    @property
+    def namebase(self):
+        return os.path.splitext(os.path.basename(self))[0]
+
+    stem = namebase
+
+    @property
+    def ext(self):
+        return os.path.splitext(self)[1]
+
+    @property
+    def parent(self):
+        return type(self)(os.path.dirname(self))
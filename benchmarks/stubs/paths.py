@@ -0,0 +1,10 @@
+"""Stand-in for Source.Python's `paths` module."""
+
+import os
+
+from path import Path
+
+PLUGIN_DATA_PATH = Path(os.environ.get(
+    'FLASHFUN_DATA_PATH',
+    os.path.join(os.path.dirname(__file__), '..', '..', 'addons', 'source-python', 'data', 'plugins')
+)).abspath()
@@ -0,0 +1,82 @@
+"""Stand-in for Source.Python's `players.entity` module."""
+
+from mathlib import QAngle
+from mathlib import Vector
+
+from entities.entity import Entity
+
+
+class Player(Entity):
+    players = dict()
+    _userids = dict()
+
+    def __new__(cls, index, caching=None):
+        try:
+            return cls.players[index]
+        except KeyError:
+            raise ValueError(f'Invalid player index: {index}') from None
+
+    def __init__(self, index, caching=None):
+        pass
+
+    @classmethod
+    def create(cls, index, userid, team=2, origin=(0.0, 0.0, 0.0)):
+        player = object.__new__(cls)
+        Entity._init_stub(player, index, 'player')
+        player.userid = userid
+        player.team = team
+        player.dead = False
+        player.health = 100
+        player.armor = 0
+        player.kills = 0
+        player.godmode = False
+        player.color = None
+        player.origin = Vector(*origin)
+        player.view_angle = QAngle()
+        player._weapons = dict()
+        player.active_weapon = None
+        player.spawn_count = 0
+        cls.players[index] = player
+        cls._userids[userid] = player
+        return player
+
+    @classmethod
+    def destroy(cls, index):
+        player = cls.players.pop(index)
+        cls._userids.pop(player.userid, None)
+        Entity.entities.pop(index, None)
+
+    @classmethod
+    def reset(cls):
+        for index in list(cls.players):
+            cls.destroy(index)
+
+    @classmethod
+    def from_userid(cls, userid, caching=None):
+        try:
+            return cls._userids[userid]
+        except KeyError:
+            raise ValueError(f'Invalid userid: {userid}') from None
+
+    def spawn(self, force=False):
+        self.dead = False
+        self.spawn_count += 1
+
+    def get_weapon(self, classname=None, is_filters=(), not_filters=()):
+        return self._weapons.get(classname)
+
+    def weapons(self, *args, **kwargs):
+        return iter(list(self._weapons.values()))
+
+    def get_active_weapon(self):
+        if self.active_weapon is not None:
+            return self.active_weapon
+        for weapon in self._weapons.values():
+            return weapon
+        return None
+
+    def give_named_item(self, classname, *args):
+        from weapons.entity import Weapon
+        weapon = Weapon.create(classname, owner=self)
+        self._weapons[classname] = weapon
+        return weapon
@@ -0,0 +1,11 @@
+"""Stand-in for Source.Python's `players.helpers` module."""
+
+from players.entity import Player
+
+
+def index_from_userid(userid):
+    return Player.from_userid(userid).index
+
+
+def userid_from_index(index):
+    return Player(index).userid
@@ -0,0 +1,16 @@
+"""Stand-in for Source.Python's `plugins.manager` module."""
+
+
+class PluginInfo(object):
+    name = 'flashfun'
+    verbose_name = 'FlashFun'
+    author = 'BackRaw'
+    version = '1.0'
+
+
+class _PluginManager(object):
+    def get_plugin_info(self, name):
+        return PluginInfo()
+
+
+plugin_manager = _PluginManager()
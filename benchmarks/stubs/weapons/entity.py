@@ -0,0 +1,13 @@
+"""Stand-in for Source.Python's `weapons.entity` module."""
+
+from entities.entity import Entity
+
+
+class Weapon(Entity):
+    @classmethod
+    def create(cls, classname, owner=None):
+        weapon = super().create(classname)
+        weapon.owner = owner
+        weapon.clip = 20
+        weapon.ammo = 100
+        return weapon
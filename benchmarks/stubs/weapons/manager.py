@@ -0,0 +1,19 @@
+"""Stand-in for Source.Python's `weapons.manager` module."""
+
+
+class _WeaponClass(object):
+    def __init__(self, basename):
+        self.basename = basename
+        self.name = 'weapon_' + basename
+
+
+class _WeaponManager(dict):
+    def __init__(self, basenames):
+        super().__init__((basename, _WeaponClass(basename)) for basename in basenames)
+        self.update({weapon.name: weapon for weapon in list(self.values())})
+
+
+weapon_manager = _WeaponManager((
+    'flashbang', 'hegrenade', 'glock', 'hkp2000', 'usp_silencer', 'deagle', 'fiveseven', 'p250',
+    'elite', 'tec9', 'cz75a', 'revolver', 'knife', 'smokegrenade', 'decoy', 'molotov', 'incgrenade',
+))